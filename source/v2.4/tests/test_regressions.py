@@ -0,0 +1,82 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+VLANG = os.path.join(os.path.dirname(os.path.dirname(__file__)), "vlang.py")
+
+
+def run_code(code, **env):
+    # Run VirtoLang code through the CLI, as a user would
+    result = subprocess.run(
+        [sys.executable, VLANG, "-C", code],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "NO_COLOR": "1", **env},
+    )
+    return result.stdout, result.stderr
+
+
+def test_return_in_finally_drops_pending_exception():
+    out, err = run_code(
+        'def f() {\n    try {\n        raise Error("x")\n    } finally {\n'
+        "        return 2\n    }\n}\nprint(f())\n"
+    )
+    assert out == "2\n"
+    assert err == ""
+
+
+def test_return_in_finally_overrides_return_in_try():
+    out, _ = run_code(
+        "def f() {\n    try {\n        return 1\n    } finally {\n"
+        "        return 3\n    }\n}\nprint(f())\n"
+    )
+    assert out == "3\n"
+
+
+def test_string_escapes():
+    out, err = run_code('print("a\\tb\\\\ \\"q\\" \\xe9 \\u4e2d")\n')
+    assert out == 'a\tb\\ "q" \u00e9 \u4e2d\n'
+    assert err == ""
+
+
+def test_unknown_escape_is_kept_as_written():
+    out, err = run_code('print("C:\\Users\\me \\d")\n')
+    assert out == "C:\\Users\\me \\d\n"
+    assert err == ""
+
+
+def test_jit_integer_overflow_falls_back_to_the_interpreter():
+    pytest.importorskip("numba")
+    out, err = run_code(
+        "def fact(n) {\n    r = 1\n    for (i in range(1, n + 1)) {\n"
+        "        r = r * i\n    }\n    return r\n}\n"
+        "print(fact(20))\nprint(fact(25))\n",
+        VLANG_JIT="1",
+    )
+    assert out == "2432902008176640000\n15511210043330985984000000\n"
+    assert err == ""
+
+
+def test_folded_negative_zero_keeps_its_sign():
+    out, _ = run_code("print(0/(0-1), 0/1)\n")
+    assert out == "-0.0 0.0\n"
+
+
+def test_import_prefers_a_module_added_earlier_in_the_search(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("vlang", VLANG)
+    vlang = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(vlang)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("VLANG_PATH", raising=False)
+    monkeypatch.setattr(sys, "argv", ["vlang"])
+    (tmp_path / "foo.vlang").write_text('print("local")')
+    interpreter = vlang.Interpreter("main.vlang")
+    assert interpreter._find_module("foo", False) == str(tmp_path / "foo.vlang")
+    (tmp_path / "packages").mkdir()
+    (tmp_path / "packages" / "foo.vlang").write_text('print("package")')
+    assert interpreter._find_module("foo", False) == str(
+        tmp_path / "packages" / "foo.vlang"
+    )
@@ -10,41 +10,77 @@ import re  # Regular expressions for tokenizing code
 import sys  # System functions (e.g., command-line args, exit)
 import os  # File and path operations
 import asyncio  # Async/await support
+import atexit  # Closing the shared event loop at exit
+import locale  # Encoding of .vlang files (as text mode uses)
 import time  # Time utilities
 import random  # Random number utilities
 import math  # Math functions
-import argparse  # Command-line argument parsing
 from colorama import init, Fore, Style, Back  # Colored terminal output
 import requests  # HTTP requests (for built-in web functions)
 from datetime import datetime  # Date/time utilities
-import tkinter as tk
-from tkinter import messagebox
+from collections import namedtuple  # Lightweight token records
+from operator import attrgetter, methodcaller  # C-level built-in accessors
+from operator import add, sub, mul, truediv, mod, eq, ne, lt, le, gt, ge
+from importlib.util import find_spec  # Optional dependency detection
 
 __version__ = "2.4"
 
 init(autoreset=True)  # Initialize colorama for colored output
+# Errors are only colored for a terminal, and never when NO_COLOR is set;
+# escape codes are noise in a pipe or log file
+_ERROR_COLOR = (
+    Fore.RED
+    if sys.stdout is not None and sys.stdout.isatty() and "NO_COLOR" not in os.environ
+    else ""
+)
+
+
+def _tk():
+    # Import tkinter on first use; loading Tcl/Tk is slow and only GUI scripts need it
+    global tk, messagebox
+    import tkinter as tk
+    from tkinter import messagebox
+
+    return tk
+
+
+def __getattr__(name):
+    # Lazy module attributes for code that does `vlang.tk` / `vlang.argparse`
+    if name in ("tk", "messagebox"):
+        _tk()
+        return globals()[name]
+    if name == "argparse":
+        global argparse
+        import argparse
+
+        return argparse
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # --------------------
 # TOKEN CLASS
 # --------------------
-class Token:
-    def __init__(self, kind, value, line, column):
-        self.kind = kind  # The type of token (e.g., IDENTIFIER, NUMBER, etc.)
-        self.value = value  # The value of the token (e.g., variable name, number)
-        self.line = line  # Line number in the source code
-        self.column = column  # Column number in the source code
-
-    def __iter__(self):
-        return iter((self.kind, self.value, self.line, self.column))
-
-    def __getitem__(self, idx):
-        return (self.kind, self.value, self.line, self.column)[idx]
+class Token(namedtuple("Token", "kind value line column")):
+    # kind: the type of token (e.g., IDENTIFIER, NUMBER, etc.)
+    # value: the value of the token (e.g., variable name, number)
+    # line/column: position in the source code
+    __slots__ = ()
 
     def __repr__(self):
         return f"Token({self.kind}, {self.value}, line={self.line}, col={self.column})"
 
 
+def _source_line(code, line):
+    # Text of the 1-based line in code (source text or its list of lines).
+    # Lines end at "\n" only, as tokenize() counts them, and source text is
+    # split no further than the line asked for.
+    if isinstance(code, str):
+        code = code.split("\n", line)
+    if 1 <= line <= len(code):
+        return code[line - 1]
+    return ""
+
+
 # --------------------
 # PARSER ERROR CLASS
 # --------------------
@@ -53,20 +89,20 @@ class ParserError(Exception):
         self.message = message  # Error message
         self.filename = filename  # Filename (for error display)
         self.token = token  # Token where the error occurred
-        self.code = code  # Source code (for error display)
-        super().__init__(self.__str__())
+        self.code = code  # Source code, or its list of lines (for error display)
+        self._str_cache = self._format()  # Built once; __str__ just returns it
+        super().__init__(self._str_cache)
 
-    def __str__(self):
+    def _format(self):
         # Only access .line and .column if token has those attributes
         if self.token and hasattr(self.token, "line") and hasattr(self.token, "column"):
             pointer = f"File \"{self.filename or '<input>'}\", line {self.token.line}, col {self.token.column}"
-            code_line = ""
-            if self.code:
-                lines = self.code.splitlines()
-                if 1 <= self.token.line <= len(lines):
-                    code_line = lines[self.token.line - 1]
-            return f"{Fore.RED}SyntaxError: {self.message}\n  {pointer}\n    {code_line}\n    {' '*(self.token.column-1)}^"
-        return f"{Fore.RED}SyntaxError: {self.message}"
+            code_line = _source_line(self.code, self.token.line) if self.code else ""
+            return f"{_ERROR_COLOR}SyntaxError: {self.message}\n  {pointer}\n    {code_line}\n    {' '*(self.token.column-1)}^"
+        return f"{_ERROR_COLOR}SyntaxError: {self.message}"
+
+    def __str__(self):
+        return self._str_cache
 
 
 # --------------------
@@ -90,80 +126,204 @@ class VirtoArgumentError(Exception):
         self.filename = filename
         self.token = token
         self.code = code
-        super().__init__(self.__str__())
+        super().__init__(message)
 
     def __str__(self):
         pointer = f"File \"{self.filename or '<input>'}\""
-        return f"{Fore.RED}ArgumentError: {self.message}\n  {pointer}"
+        return f"{_ERROR_COLOR}ArgumentError: {self.message}\n  {pointer}"
 
 
 # --------------------
 # TOKENIZER
 # --------------------
-# Precompile token regex at module load for speed
-_token_spec = [
-    ("NUMBER", r"\d+"),
-    ("PRINT", r"\bprint\b"),
-    ("IF", r"\bif\b"),
-    ("ASYNC", r"\basync\b"),
-    ("AWAIT", r"\bawait\b"),
-    ("ELSE", r"\belse\b"),
-    ("ELIF", r"\belif\b"),
-    ("WHILE", r"\bwhile\b"),
-    ("FOR", r"\bfor\b"),
-    ("RETURN", r"\breturn\b"),
-    ("DEF", r"\bdef\b"),
-    ("TRUE", r"\btrue\b"),
-    ("FALSE", r"\bfalse\b"),
-    ("NULL", r"\bnull\b"),
-    ("IMPORT", r"\bimport\b"),
-    ("WITH", r"\bwith\b"),
-    ("AS", r"\bas\b"),
-    ("IS", r"\bis\b"),
-    ("IN", r"\bin\b"),
-    ("NOT", r"\bnot\b"),
-    ("STRING", r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''),
-    ("LE", r"<="),
-    ("GE", r">="),
-    ("EQ", r"=="),
-    ("NEQ", r"!="),
-    ("LT", r"<"),
-    ("GT", r">"),
-    ("ASSIGN", r"="),
-    ("IDENTIFIER", r"[a-zA-Z_]\w*"),
-    ("PLUS", r"\+"),
-    ("SKIP", r"[ \t]+"),
-    ("NEWLINE", r"\n"),
-    ("LBRACE", r"\{"),
-    ("RBRACE", r"\}"),
-    ("LPAREN", r"\("),
-    ("RPAREN", r"\)"),
-    ("MINUS", r"-"),
-    ("MULTIPLY", r"\*"),
-    ("C_COMMENT", r"//.*"),
-    ("DIVIDE", r"/"),
-    ("COMMA", r","),
-    ("SEMICOLON", r";"),
-    ("COLON", r":"),
-    ("DOT", r"\."),
-    ("AND", r"&&"),
-    ("OR", r"\|\|"),
-    ("BANG", r"!"),
-    ("LBRACKET", r"\["),
-    ("RBRACKET", r"\]"),
-    ("COMMENT", r"#.*"),
-    ("BLOCK_COMMENT", r"/\*.*?\\*/"),
-    ("RAISE", r"raise"),
-    ("TRY", r"try"),
-    ("EXCEPT", r"except"),
-    ("FINALLY", r"finally"),
-    ("PERCENT", r"%"),
-    ("MISMATCH", r"."),
-]
-_token_regex = re.compile(
-    "|".join(f"(?P<{name}>{pattern})" for name, pattern in _token_spec), re.DOTALL
+# Token kinds the tokenizer produces for non-keyword text; keywords get
+# theirs from _KEYWORD_KIND. tokenize() scans with the first-character
+# dispatch table below rather than a master regex over every kind.
+_TOKEN_KINDS_SCANNED = (
+    "NUMBER",
+    "IDENTIFIER",
+    "LE",
+    "GE",
+    "EQ",
+    "NEQ",
+    "LT",
+    "GT",
+    "ASSIGN",
+    "PLUS",
+    "MINUS",
+    "MULTIPLY",
+    "DIVIDE",
+    "PERCENT",
+    "AND",
+    "OR",
+    "BANG",
+    "LBRACE",
+    "RBRACE",
+    "LPAREN",
+    "RPAREN",
+    "LBRACKET",
+    "RBRACKET",
+    "COMMA",
+    "SEMICOLON",
+    "COLON",
+    "DOT",
+    "SKIP",
+    "NEWLINE",
+    "COMMENT",
+    "C_COMMENT",
+    "MISMATCH",
 )
 
+# Keyword text -> token kind, built once instead of per identifier
+_KEYWORD_KIND = {
+    keyword: keyword.upper()
+    for keyword in (
+        "if",
+        "else",
+        "elif",
+        "while",
+        "for",
+        "return",
+        "def",
+        "true",
+        "false",
+        "null",
+        "and",
+        "or",
+        "not",
+        "is",
+        "in",
+        "print",
+        "import",
+        "with",
+        "as",
+        "async",
+        "await",
+        "try",
+        "except",
+        "finally",
+        "raise",
+    )
+}
+
+
+# Per-token scanners, each compiled once and only tried when the current
+# character can start that kind of token
+_NUMBER_RE = re.compile(r"\d+")
+_IDENTIFIER_RE = re.compile(r"[a-zA-Z_]\w*")
+_SKIP_RE = re.compile(r"[ \t]+")
+_LINE_COMMENT_RE = re.compile(r"(?://|#)[^\n]*")
+
+# Two-character operators and comment openers, checked before the
+# single-character token of the same first character
+_OPERATOR_PAIRS = {
+    "<=": "LE",
+    ">=": "GE",
+    "==": "EQ",
+    "!=": "NEQ",
+    "&&": "AND",
+    "||": "OR",
+    "//": "C_COMMENT",
+    "/*": "BLOCK_COMMENT",
+}
+_PAIR_START = frozenset(pair[0] for pair in _OPERATOR_PAIRS)
+
+# First-character dispatch table for ASCII source: (scanner, kind), where a
+# scanner of None means the token is the single character itself
+_FIRSTCHAR = [None] * 128
+for _char in "0123456789":
+    _FIRSTCHAR[ord(_char)] = (_NUMBER_RE, "NUMBER")
+for _char in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_":
+    _FIRSTCHAR[ord(_char)] = (_IDENTIFIER_RE, "IDENTIFIER")
+for _char in " \t":
+    _FIRSTCHAR[ord(_char)] = (_SKIP_RE, "SKIP")
+_FIRSTCHAR[ord("#")] = (_LINE_COMMENT_RE, "COMMENT")
+for _char, _kind in (
+    ("\n", "NEWLINE"),
+    ('"', "STRING"),
+    ("'", "STRING"),
+    ("<", "LT"),
+    (">", "GT"),
+    ("=", "ASSIGN"),
+    ("!", "BANG"),
+    ("&", "MISMATCH"),
+    ("|", "MISMATCH"),
+    ("+", "PLUS"),
+    ("-", "MINUS"),
+    ("*", "MULTIPLY"),
+    ("/", "DIVIDE"),
+    ("%", "PERCENT"),
+    ("{", "LBRACE"),
+    ("}", "RBRACE"),
+    ("(", "LPAREN"),
+    (")", "RPAREN"),
+    ("[", "LBRACKET"),
+    ("]", "RBRACKET"),
+    (",", "COMMA"),
+    (";", "SEMICOLON"),
+    (":", "COLON"),
+    (".", "DOT"),
+):
+    _FIRSTCHAR[ord(_char)] = (None, _kind)
+del _char, _kind
+# Token kind of each ASCII character that is a whole token by itself
+# (punctuation that no two-character operator starts with), else None
+_PUNCTUATION = [
+    (
+        entry[1]
+        if entry is not None
+        and entry[0] is None
+        and entry[1] not in ("NEWLINE", "STRING", "MISMATCH")
+        and chr(code_point) not in _PAIR_START
+        else None
+    )
+    for code_point, entry in enumerate(_FIRSTCHAR)
+]
+
+
+def _string_end(code, start):
+    """Return the index just past the string literal opening at start, or -1 if unterminated."""
+    quote = code[start]
+    end = start
+    while True:
+        end = code.find(quote, end + 1)
+        if end < 0:
+            return -1
+        # The quote is escaped only by an odd run of backslashes before it
+        run = end - 1
+        while code[run] == "\\":
+            run -= 1
+        if (end - 1 - run) % 2 == 0:
+            return end + 1
+
+
+# Backslash escapes a string literal may use, other than \xNN and \uNNNN
+_SIMPLE_ESCAPES = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "\\": "\\",
+    '"': '"',
+    "'": "'",
+}
+_ESCAPE_RE = re.compile(r"\\(x[0-9A-Fa-f]{2}|u[0-9A-Fa-f]{4}|.)", re.DOTALL)
+
+
+def _escape_char(match):
+    seq = match.group(1)
+    if len(seq) > 1:
+        return chr(int(seq[1:], 16))
+    # Any other backslash is kept as written, e.g. in "C:\Users"
+    return _SIMPLE_ESCAPES.get(seq, match.group())
+
+
+def _decode_escapes(raw):
+    # Resolve backslash escapes (\n, \t, \\, \", \xNN, ...) in a string
+    # literal body
+    if "\\" not in raw:
+        return raw
+    return _ESCAPE_RE.sub(_escape_char, raw)
+
 
 # --------------------
 # TOKENIZE FUNCTION
@@ -174,224 +334,442 @@ def tokenize(code):
     Each token represents a meaningful element (number, identifier, symbol, etc.).
     """
     tokens = []
-    regex = _token_regex
+    append = tokens.append
+    # Build tokens with tuple.__new__ directly, skipping namedtuple's
+    # Python-level __new__ frame for every token
+    new_token = tuple.__new__
+    firstchar = _FIRSTCHAR
+    punctuation = _PUNCTUATION
+    keyword_kind = _KEYWORD_KIND
+    skip_re = _SKIP_RE
+    length = len(code)
+    pos = 0
     line_num = 1
     line_start = 0
-    for match in regex.finditer(code):
-        kind = match.lastgroup
-        value = match.group()
-        start = match.start()
-        end = match.end()
-        column = start - line_start + 1
+    while pos < length:
+        char = code[pos]
+        if char == " ":
+            # Lone spaces between tokens are the most common thing skipped
+            pos += 1
+            continue
+        code_point = ord(char)
+        if code_point < 128:
+            kind = punctuation[code_point]
+            if kind is not None:
+                # The character is the token's value; nothing else to check
+                append(new_token(Token, (kind, char, line_num, pos - line_start + 1)))
+                pos += 1
+                continue
+            entry = firstchar[code_point]
+        else:
+            entry = None
+        column = pos - line_start + 1
+        if entry is None:
+            # Outside the dispatch table only Unicode digits form a token
+            match = _NUMBER_RE.match(code, pos)
+            if match:
+                kind = "NUMBER"
+                end = match.end()
+            else:
+                kind = "MISMATCH"
+                end = pos + 1
+        else:
+            scanner, kind = entry
+            if scanner is None:
+                end = pos + 1
+                if kind == "STRING":
+                    end = _string_end(code, pos)
+                    if end < 0:
+                        raise ParserError(
+                            "Unterminated string literal",
+                            None,
+                            Token(kind, char, line_num, column),
+                            code,
+                        )
+                elif char in _PAIR_START:
+                    pair = _OPERATOR_PAIRS.get(code[pos : pos + 2])
+                    if pair == "C_COMMENT":
+                        kind = pair
+                        end = _LINE_COMMENT_RE.match(code, pos).end()
+                    elif pair == "BLOCK_COMMENT":
+                        kind = pair
+                        end = code.find("*/", pos + 2)
+                        if end < 0:
+                            raise ParserError(
+                                "Unterminated block comment",
+                                None,
+                                Token(kind, "/*", line_num, column),
+                                code,
+                            )
+                        end += 2
+                    elif pair is not None:
+                        kind = pair
+                        end = pos + 2
+            else:
+                match = scanner.match(code, pos)
+                if match:
+                    end = match.end()
+                else:
+                    kind = "MISMATCH"
+                    end = pos + 1
         if kind == "NEWLINE":
             line_num += 1
             line_start = end
+            # Skip the next line's indentation here rather than as a SKIP
+            # token of its own on the next pass
+            match = skip_re.match(code, end)
+            pos = match.end() if match else end
             continue
-        if kind == "SKIP":
+        if kind == "SKIP" or kind == "COMMENT" or kind == "C_COMMENT":
+            pos = end
             continue
-        elif kind == "MISMATCH":
+        value = code[pos:end]
+        if kind == "MISMATCH":
             raise ParserError(
                 f"Unexpected character: {value}",
+                None,
                 Token(kind, value, line_num, column),
                 code,
             )
-        elif kind in ("COMMENT", "BLOCK_COMMENT", "C_COMMENT"):
+        if kind == "STRING" or kind == "BLOCK_COMMENT":
+            # Both may span lines; keep line/column tracking in step
+            newlines = code.count("\n", pos, end)
+            if newlines:
+                line_num += newlines
+                line_start = code.rfind("\n", pos, end) + 1
+            pos = end
+            if kind == "BLOCK_COMMENT":
+                continue
+            # Store the literal's contents, unquoted and with escapes resolved
+            value = _decode_escapes(value[1:-1])
+            append(new_token(Token, (kind, value, line_num - newlines, column)))
             continue
-        elif kind == "NUMBER":
+        pos = end
+        if kind == "NUMBER":
             value = int(value)
         elif kind == "IDENTIFIER":
-            # Check for keywords and convert to keyword token type
-            keywords = (
-                "if",
-                "else",
-                "elif",
-                "while",
-                "for",
-                "return",
-                "def",
-                "true",
-                "false",
-                "null",
-                "and",
-                "or",
-                "not",
-                "print",
-                "import",
-                "with",
-                "as",
-                "async",
-                "await",
-                "try",
-                "except",
-                "finally",
-                "raise",
-            )
-            if value in keywords:
-                kind = value.upper()
-        tokens.append(Token(kind, value, line_num, column))
+            # Keywords map straight to their token kind
+            kind = keyword_kind.get(value, kind)
+        append(new_token(Token, (kind, value, line_num, column)))
     return tokens
 
 
+# --------------------
+# TOKEN KIND IDS
+# --------------------
+# Every token kind the tokenizer can emit, plus the parser's EOF sentinel,
+# numbered so the parser can compare small ints instead of strings
+_TOKEN_KINDS = tuple(
+    dict.fromkeys(
+        ("EOF", "STRING", "BLOCK_COMMENT")
+        + _TOKEN_KINDS_SCANNED
+        + tuple(_KEYWORD_KIND.values())
+    )
+)
+_KIND_ID = {kind: index for index, kind in enumerate(_TOKEN_KINDS)}
+# Ids of the kinds the parser tests directly
+_K_EOF = _KIND_ID["EOF"]
+_K_NUMBER = _KIND_ID["NUMBER"]
+_K_IDENTIFIER = _KIND_ID["IDENTIFIER"]
+_K_STRING = _KIND_ID["STRING"]
+_K_ASSIGN = _KIND_ID["ASSIGN"]
+_K_LPAREN = _KIND_ID["LPAREN"]
+_K_RPAREN = _KIND_ID["RPAREN"]
+_K_LBRACE = _KIND_ID["LBRACE"]
+_K_RBRACE = _KIND_ID["RBRACE"]
+_K_LBRACKET = _KIND_ID["LBRACKET"]
+_K_RBRACKET = _KIND_ID["RBRACKET"]
+_K_COMMA = _KIND_ID["COMMA"]
+_K_NOT = _KIND_ID["NOT"]
+_K_IS = _KIND_ID["IS"]
+_K_IN = _KIND_ID["IN"]
+_K_AS = _KIND_ID["AS"]
+_K_ASYNC = _KIND_ID["ASYNC"]
+_K_AWAIT = _KIND_ID["AWAIT"]
+_K_DEF = _KIND_ID["DEF"]
+_K_IF = _KIND_ID["IF"]
+_K_ELIF = _KIND_ID["ELIF"]
+_K_ELSE = _KIND_ID["ELSE"]
+_K_WHILE = _KIND_ID["WHILE"]
+_K_FOR = _KIND_ID["FOR"]
+_K_WITH = _KIND_ID["WITH"]
+_K_PRINT = _KIND_ID["PRINT"]
+_K_IMPORT = _KIND_ID["IMPORT"]
+_K_RETURN = _KIND_ID["RETURN"]
+_K_TRY = _KIND_ID["TRY"]
+_K_EXCEPT = _KIND_ID["EXCEPT"]
+_K_FINALLY = _KIND_ID["FINALLY"]
+_K_RAISE = _KIND_ID["RAISE"]
+
+
+# --------------------
+# AST NODE TAGS
+# --------------------
+# Every node the parser builds starts with one of these interned tags, so
+# the interpreter can dispatch with identity checks
+_T_ASSIGN = sys.intern("assign")
+_T_FUNCTION_DECL = sys.intern("function_decl")
+_T_ASYNC_FUNCTION_DECL = sys.intern("async_function_decl")
+_T_PRINT = sys.intern("print")
+_T_EXPR_STMT = sys.intern("expr_stmt")
+_T_NUMBER = sys.intern("number")
+_T_IDENTIFIER = sys.intern("identifier")
+_T_STRING = sys.intern("string")
+_T_IF = sys.intern("if")
+_T_WHILE = sys.intern("while")
+_T_FOR = sys.intern("for")
+_T_LIST = sys.intern("list")
+_T_CALL = sys.intern("call")
+_T_IMPORT = sys.intern("import")
+_T_WITH = sys.intern("with")
+_T_RETURN = sys.intern("return")
+_T_AWAIT_STMT = sys.intern("await_stmt")
+_T_RUN_STMT = sys.intern("run_stmt")
+_T_RUN_ASYNC_STMT = sys.intern("run_async_stmt")
+_T_AWAIT_EXPR = sys.intern("await_expr")
+_T_TRY = sys.intern("try")
+_T_RAISE = sys.intern("raise")
+_T_OR = sys.intern("or")
+_T_AND = sys.intern("and")
+_T_NOT = sys.intern("not")
+_T_IS = sys.intern("is")
+_T_IS_NOT = sys.intern("is not")
+_T_IN = sys.intern("in")
+_T_NOT_IN = sys.intern("not in")
+_T_EQ = sys.intern("==")
+_T_NEQ = sys.intern("!=")
+_T_LT = sys.intern("<")
+_T_LE = sys.intern("<=")
+_T_GT = sys.intern(">")
+_T_GE = sys.intern(">=")
+_T_PLUS = sys.intern("+")
+_T_MINUS = sys.intern("-")
+_T_MULTIPLY = sys.intern("*")
+_T_DIVIDE = sys.intern("/")
+_T_PERCENT = sys.intern("%")
+
+
+# --------------------
+# OPERATOR PRECEDENCE
+# --------------------
+# Binding power of each binary operator token (higher binds tighter); all
+# binary operators are left-associative. NOT only appears here as the start
+# of 'not in'.
+_BINARY_PRECEDENCE = {
+    "OR": 1,
+    "AND": 2,
+    "IS": 4,
+    "IN": 5,
+    "NOT": 5,
+    "EQ": 6,
+    "NEQ": 6,
+    "LT": 6,
+    "LE": 6,
+    "GT": 6,
+    "GE": 6,
+    "PLUS": 7,
+    "MINUS": 7,
+    "MULTIPLY": 8,
+    "DIVIDE": 8,
+    "PERCENT": 8,
+}
+# The same table indexed by token kind id (None for non-operators)
+_PRECEDENCE_BY_KIND = [None] * len(_TOKEN_KINDS)
+for _kind, _prec in _BINARY_PRECEDENCE.items():
+    _PRECEDENCE_BY_KIND[_KIND_ID[_kind]] = _prec
+del _kind, _prec
+# Precedence of the prefix 'not' operator
+_NOT_PRECEDENCE = 3
+# AST tag emitted for each binary operator token, keyed by kind id
+_BINARY_OPS = {
+    _KIND_ID[_kind]: _tag
+    for _kind, _tag in {
+        "OR": _T_OR,
+        "AND": _T_AND,
+        "IN": _T_IN,
+        "EQ": _T_EQ,
+        "NEQ": _T_NEQ,
+        "LT": _T_LT,
+        "LE": _T_LE,
+        "GT": _T_GT,
+        "GE": _T_GE,
+        "PLUS": _T_PLUS,
+        "MINUS": _T_MINUS,
+        "MULTIPLY": _T_MULTIPLY,
+        "DIVIDE": _T_DIVIDE,
+        "PERCENT": _T_PERCENT,
+    }.items()
+}
+
+
 # --------------------
 # PARSER CLASS
 # --------------------
 class Parser:
     def __init__(self, filename, tokens, code=None):
         self.filename = filename
-        self.tokens = tokens
+        # Trailing EOF sentinel: lookahead never runs off the end, so the
+        # hot paths index without bounds checks
+        self.tokens = list(tokens) + [Token("EOF", None, -1, -1)]
         self.pos = 0
         self.code = code
+        self._code_lines = None  # Split lazily, only once an error is reported
+        # Parallel kind-id and value lists so hot paths compare small ints
+        # instead of reading attributes off Token objects
+        kind_id = _KIND_ID
+        self._kinds = [kind_id[t.kind] for t in self.tokens]
+        self._values = [t.value for t in self.tokens]
+        # One shared node per distinct literal, keyed by kind, type and value
+        self._literals = {}
+
+    def _literal(self, kind, value):
+        key = (kind, type(value), value)
+        node = self._literals.get(key)
+        if node is None:
+            tag = _T_NUMBER if kind == _K_NUMBER else _T_STRING
+            node = self._literals[key] = (tag, value)
+        return node
 
     def peek(self):
-        if self.pos < len(self.tokens):
-            return self.tokens[self.pos]
-        return None
+        return self.tokens[self.pos]
 
     def advance(self):
         self.pos += 1
 
-    def match(self, *token_types):
-        token = self.peek()
-        if token and token.kind in token_types:
-            self.advance()
-            return token
+    def match(self, kind):
+        # Consume and return the current token if it has the given kind id;
+        # every caller checks a single kind, so no varargs tuple is built
+        pos = self.pos
+        if self._kinds[pos] == kind:
+            self.pos = pos + 1
+            return self.tokens[pos]
         return None
 
+    def _match1(self, kind):
+        # match() for callers that only need to know whether the token was
+        # consumed
+        pos = self.pos
+        if self._kinds[pos] == kind:
+            self.pos = pos + 1
+            return True
+        return False
+
     def error(self, message, token=None):
         if token is None:
             token = self.peek()
+        if token.kind == "EOF":
+            token = None  # End of input has no source position to point at
+        if self._code_lines is None and self.code:
+            self._code_lines = self.code.split("\n")
         # Always raise ParserError, not SyntaxError
-        raise ParserError(message, self.filename, token, self.code)
+        raise ParserError(message, self.filename, token, self._code_lines)
 
     def parse(self):
         statements = []
-        while self.peek():
+        kinds = self._kinds
+        while kinds[self.pos] != _K_EOF:
             stmt = self.statement()
             if stmt:
                 statements.append(stmt)
         return statements
 
     def statement(self):
+        pos = self.pos
+        kind = self._kinds[pos]
         # Assignment: IDENTIFIER ASSIGN expression
-        if self.peek() and self.peek().kind == "IDENTIFIER":
-            # Lookahead for assignment
-            if (
-                self.pos + 1 < len(self.tokens)
-                and self.tokens[self.pos + 1].kind == "ASSIGN"
-            ):
-                name_token = self.match("IDENTIFIER")
-                self.match("ASSIGN")
-                expr = self.expression()
-                return ("assign", name_token[1], expr)
-            # If next token is LPAREN, treat as function call statement (e.g., run(...), run_async(...))
-            elif (
-                self.pos + 1 < len(self.tokens)
-                and self.tokens[self.pos + 1].kind == "LPAREN"
-            ):
+        if kind == _K_IDENTIFIER:
+            # Lookahead for assignment; the EOF sentinel keeps pos + 1 in range
+            if self._kinds[pos + 1] == _K_ASSIGN:
+                name = self._values[pos]
+                self.pos = pos + 2
                 expr = self.expression()
-                return ("expr_stmt", expr)
-        # async def ...
-        elif self.peek() and self.peek().kind == "ASYNC":
-            self.advance()  # consume ASYNC
-            if not self.match("DEF"):
-                self.error("Expected 'def' after 'async'")
-            next_token = self.peek()
-            if not next_token:
-                self.error(
-                    "Expected function name after 'async def', but found end of input"
-                )
-            if next_token.kind != "IDENTIFIER":
-                self.error(
-                    f"Expected function name after 'async def', but found {next_token.kind} ('{next_token.value}') instead",
-                    next_token,
-                )
-            name_token = self.match("IDENTIFIER")
-            name = name_token[1]
-            if not self.match("LPAREN"):
-                self.error("Expected '(' after function name")
-            params = []
-            if not self.match("RPAREN"):
-                while True:
-                    param_token = self.match("IDENTIFIER")
-                    if not param_token:
-                        self.error("Expected parameter name in function definition")
-                    params.append(param_token[1])
-                    if self.match("COMMA"):
-                        continue
-                    elif self.match("RPAREN"):
-                        break
-                    else:
-                        self.error("Expected ',' or ')' in parameter list")
-            if not self.match("LBRACE"):
-                self.error("Expected '{' to start function body")
-            body = self.block()
-            return ("async_function_decl", name, params, body)
-        elif self.match("DEF"):
-            return self.function_declaration()
-        elif self.match("IF"):
-            return self.if_statement()
-        elif self.match("WHILE"):
-            return self.while_statement()
-        elif self.match("FOR"):
-            return self.for_statement()
-        elif self.match("WITH"):
-            return self.with_statement()
-        elif self.match("PRINT"):
-            return self.print_statement()
-        elif self.match("IMPORT"):
-            return self.import_statement()
-        elif self.match("RETURN"):
-            return self.return_statement()
-        elif self.match("AWAIT"):
-            return self.await_statement()
-        elif self.match("TRY"):
-            return self.try_statement()
-        elif self.match("RAISE"):
-            return self.raise_statement()
-        else:
+                return (_T_ASSIGN, name, expr)
+            # Anything else starting with a name (e.g. run(...), run_async(...)) is an expression
             return self.expression_statement()
+        handler = self._STMT_DISPATCH.get(kind)
+        if handler is not None:
+            self.pos += 1  # consume the statement keyword
+            return handler(self)
+        return self.expression_statement()
+
+    def async_function_declaration(self):
+        if not self._match1(_K_DEF):
+            self.error("Expected 'def' after 'async'")
+        next_token = self.peek()
+        if next_token.kind == "EOF":
+            self.error(
+                "Expected function name after 'async def', but found end of input"
+            )
+        if next_token.kind != "IDENTIFIER":
+            self.error(
+                f"Expected function name after 'async def', but found {next_token.kind} ('{next_token.value}') instead",
+                next_token,
+            )
+        name_token = self.match(_K_IDENTIFIER)
+        name = name_token[1]
+        if not self._match1(_K_LPAREN):
+            self.error("Expected '(' after function name")
+        params = []
+        if not self._match1(_K_RPAREN):
+            while True:
+                param_token = self.match(_K_IDENTIFIER)
+                if not param_token:
+                    self.error("Expected parameter name in function definition")
+                params.append(param_token[1])
+                if self._match1(_K_COMMA):
+                    continue
+                elif self._match1(_K_RPAREN):
+                    break
+                else:
+                    self.error("Expected ',' or ')' in parameter list")
+        if not self._match1(_K_LBRACE):
+            self.error("Expected '{' to start function body")
+        body = self.block()
+        return (_T_ASYNC_FUNCTION_DECL, name, params, body)
 
     def raise_statement(self):
         expr = self.expression()
-        return ("raise", expr)
+        return (_T_RAISE, expr)
 
     def import_statement(self):
         # Accept either IDENTIFIER or STRING after 'import'
-        module_token = self.match("IDENTIFIER")
-        if not module_token:
-            module_token = self.match("STRING")
+        module_token = self.match(_K_IDENTIFIER)
+        if module_token:
+            return (_T_IMPORT, module_token[1], False)
+        module_token = self.match(_K_STRING)
         if not module_token:
             raise SyntaxError(
                 "Expected module name (identifier or string) after 'import'"
             )
-        return ("import", module_token[1])
+        # A string names a file path rather than a package module
+        return (_T_IMPORT, module_token[1], True)
 
     def function_declaration(self):
-        name = self.match("IDENTIFIER")
+        name = self.match(_K_IDENTIFIER)
         if not name:
             self.error("Expected function name after 'def'")
-        if not self.match("LPAREN"):
+        if not self._match1(_K_LPAREN):
             self.error("Expected '(' after function name")
         params = []
-        if not self.match("RPAREN"):
+        if not self._match1(_K_RPAREN):
             while True:
-                param = self.match("IDENTIFIER")
+                param = self.match(_K_IDENTIFIER)
                 if not param:
                     self.error("Expected parameter name in function definition")
                 params.append(param[1])
-                if self.match("COMMA"):
+                if self._match1(_K_COMMA):
                     continue
-                elif self.match("RPAREN"):
+                elif self._match1(_K_RPAREN):
                     break
                 else:
                     self.error("Expected ',' or ')' in parameter list")
-        if not self.match("LBRACE"):
+        if not self._match1(_K_LBRACE):
             self.error("Expected '{' to start function body")
         body = self.block()
-        return ("function_decl", name[1], params, body)
+        return (_T_FUNCTION_DECL, name[1], params, body)
 
     def if_statement(self):
-        lparen = self.match("LPAREN")
+        lparen = self.match(_K_LPAREN)
         if not lparen:
             self.error("Expected '(' after 'if'", lparen)
         cond_start = self.pos
@@ -406,901 +784,2266 @@ class Parser:
                     token,
                 )
             raise
-        if not self.match("RPAREN"):
+        if not self._match1(_K_RPAREN):
             token = self.peek()
             self.error(
                 "Expected ')' after if condition. Make sure your condition is valid. Example: if (x not in y) {{ ... }}",
                 token,
             )
-        if not self.match("LBRACE"):
+        if not self._match1(_K_LBRACE):
             token = self.peek()
             self.error("Expected '{' after if condition", token)
         then_block = self.block()
         elif_blocks = []
-        while self.match("ELIF"):
-            if not self.match("LPAREN"):
+        while self._match1(_K_ELIF):
+            if not self._match1(_K_LPAREN):
                 self.error("Expected '(' after 'elif'")
             elif_cond = self.expression()
-            if not self.match("RPAREN"):
+            if not self._match1(_K_RPAREN):
                 self.error("Expected ')' after elif condition")
-            if not self.match("LBRACE"):
+            if not self._match1(_K_LBRACE):
                 self.error("Expected '{' after elif condition")
             elif_block = self.block()
             elif_blocks.append((elif_cond, elif_block))
         else_block = None
-        if self.match("ELSE"):
-            if not self.match("LBRACE"):
+        if self._match1(_K_ELSE):
+            if not self._match1(_K_LBRACE):
                 self.error("Expected '{' after 'else'")
             else_block = self.block()
-        return ("if", cond, then_block, elif_blocks, else_block)
+        return (_T_IF, cond, then_block, elif_blocks, else_block)
 
     def while_statement(self):
-        if not self.match("LPAREN"):
+        if not self._match1(_K_LPAREN):
             raise SyntaxError("Expected '(' after 'while'")
         cond = self.expression()
-        if not self.match("RPAREN"):
+        if not self._match1(_K_RPAREN):
             raise SyntaxError("Expected ')' after while condition")
-        if not self.match("LBRACE"):
+        if not self._match1(_K_LBRACE):
             raise SyntaxError("Expected '{' after while condition")
         body = self.block()
-        return ("while", cond, body)
+        return (_T_WHILE, cond, body)
 
     def for_statement(self):
-        if not self.match("LPAREN"):
+        if not self._match1(_K_LPAREN):
             raise SyntaxError("Expected '(' after 'for'")
-        var = self.match("IDENTIFIER")
+        var = self.match(_K_IDENTIFIER)
         if not var:
             raise SyntaxError("Expected variable name in for loop")
         # Match 'in' as a keyword token, not as an identifier
-        if not self.match("IN"):
+        if not self._match1(_K_IN):
             self.error("Expected 'in' in for loop")
         iterable = self.expression()
-        if not self.match("RPAREN"):
+        if not self._match1(_K_RPAREN):
             raise SyntaxError("Expected ')' after for loop header")
-        if not self.match("LBRACE"):
+        if not self._match1(_K_LBRACE):
             raise SyntaxError("Expected '{' after for loop header")
         body = self.block()
-        return ("for", var[1], iterable, body)
+        return (_T_FOR, var[1], iterable, body)
 
     def with_statement(self):
-        if not self.match("LPAREN"):
+        if not self._match1(_K_LPAREN):
             raise SyntaxError("Expected '(' after 'with'")
         expr = self.expression()
-        if not self.match("AS"):
+        if not self._match1(_K_AS):
             raise SyntaxError("Expected 'as' in with statement")
-        var = self.match("IDENTIFIER")
+        var = self.match(_K_IDENTIFIER)
         if not var:
             raise SyntaxError("Expected variable name after 'as'")
-        if not self.match("RPAREN"):
+        if not self._match1(_K_RPAREN):
             raise SyntaxError("Expected ')' after with statement")
-        if not self.match("LBRACE"):
+        if not self._match1(_K_LBRACE):
             raise SyntaxError("Expected '{' after with statement")
         body = self.block()
-        return ("with", expr, var[1], body)
+        return (_T_WITH, expr, var[1], body)
 
     def block(self):
         stmts = []
-        while not self.match("RBRACE"):
-            if not self.peek():
+        while not self._match1(_K_RBRACE):
+            if self._kinds[self.pos] == _K_EOF:
                 raise SyntaxError("Unclosed block")
             stmts.append(self.statement())
         return stmts
 
     def print_statement(self):
-        lparen = self.match("LPAREN")
+        lparen = self.match(_K_LPAREN)
         if not lparen:
             raise SyntaxError("Expected '(' after 'print'")
         args = []
-        if not self.match("RPAREN"):
+        if not self._match1(_K_RPAREN):
             while True:
                 args.append(self.expression())
-                if self.match("COMMA"):
+                if self._match1(_K_COMMA):
                     continue
-                elif self.match("RPAREN"):
+                elif self._match1(_K_RPAREN):
                     break
                 else:
                     raise SyntaxError("Expected ',' or ')' after print argument")
-        return ("print", args)
+        return (_T_PRINT, args)
 
     def return_statement(self):
         expr = self.expression()
-        return ("return", expr)
+        return (_T_RETURN, expr)
 
     def await_statement(self):
         expr = self.expression()
-        return ("await_stmt", expr)
+        return (_T_AWAIT_STMT, expr)
 
     def run_statement(self):
         filename_expr = self.expression()
-        return ("run_stmt", filename_expr)
+        return (_T_RUN_STMT, filename_expr)
 
     def run_async_statement(self):
         filename_expr = self.expression()
-        return ("run_async_stmt", filename_expr)
+        return (_T_RUN_ASYNC_STMT, filename_expr)
 
     def expression_statement(self):
         expr = self.expression()
-        return ("expr_stmt", expr)
-
-    def expression(self):
-        return self.logic_or()
-
-    def logic_or(self):
-        node = self.logic_and()
-        while self.match("OR"):
-            right = self.logic_and()
-            node = ("or", node, right)
-        return node
-
-    def logic_and(self):
-        node = self.logic_not()
-        while self.match("AND"):
-            right = self.logic_not()
-            node = ("and", node, right)
-        return node
+        return (_T_EXPR_STMT, expr)
 
-    def logic_not(self):
-        if self.match("NOT"):
-            expr = self.logic_not()
-            return ("not", expr)
-        return self.logic_is()
-
-    def logic_is(self):
-        node = self.logic_in()
+    def binary(self, min_prec=1):
+        # Precedence climbing over _BINARY_PRECEDENCE; 'not' is a prefix
+        # operator binding looser than every comparison but tighter than and/or
+        if min_prec <= _NOT_PRECEDENCE and self._match1(_K_NOT):
+            node = (_T_NOT, self.binary(_NOT_PRECEDENCE))
+        else:
+            node = self.factor()
+        kinds = self._kinds
+        precedence = _PRECEDENCE_BY_KIND
         while True:
-            if self.match("IS"):
-                if self.match("NOT"):
-                    right = self.logic_in()
-                    node = ("is not", node, right)
-                else:
-                    right = self.logic_in()
-                    node = ("is", node, right)
-            else:
+            kind = kinds[self.pos]
+            prec = precedence[kind]
+            if prec is None or prec < min_prec:
                 break
-        return node
-
-    def logic_in(self):
-        node = self.equality()
-        while True:
-            if self.match("NOT"):
-                if self.match("IN"):
-                    right = self.equality()
-                    node = ("not in", node, right)
-                else:
-                    self.pos -= 1  # Unconsume NOT if not followed by IN
+            if kind == _K_NOT:
+                # Only 'not in' continues an expression; the EOF sentinel
+                # keeps the two-token lookahead in range
+                if kinds[self.pos + 1] != _K_IN:
                     break
-            elif self.match("IN"):
-                right = self.equality()
-                node = ("in", node, right)
-            else:
-                break
-        return node
-
-    def equality(self):
-        node = self.comparison()
-        while True:
-            if self.match("EQ"):
-                right = self.comparison()
-                node = ("==", node, right)
-            elif self.match("NEQ"):
-                right = self.comparison()
-                node = ("!=", node, right)
-            else:
-                break
-        return node
-
-    def comparison(self):
-        node = self.additive()
-        while True:
-            if self.match("LT"):
-                right = self.additive()
-                node = ("<", node, right)
-            elif self.match("LE"):
-                right = self.additive()
-                node = ("<=", node, right)
-            elif self.match("GT"):
-                right = self.additive()
-                node = (">", node, right)
-            elif self.match("GE"):
-                right = self.additive()
-                node = (">=", node, right)
-            elif self.match("EQ"):
-                right = self.additive()
-                node = ("==", node, right)
-            elif self.match("NEQ"):
-                right = self.additive()
-                node = ("!=", node, right)
-            else:
-                break
-        return node
-
-    def additive(self):
-        node = self.term()
-        while True:
-            if self.match("PLUS"):
-                right = self.term()
-                node = ("+", node, right)
-            elif self.match("MINUS"):
-                right = self.term()
-                node = ("-", node, right)
+                self.pos += 2
+                op = _T_NOT_IN
+            elif kind == _K_IS:
+                self.pos += 1
+                op = _T_IS_NOT if self._match1(_K_NOT) else _T_IS
             else:
-                break
+                self.pos += 1
+                op = _BINARY_OPS[kind]
+            right = self.binary(prec + 1)
+            node = (op, node, right)
         return node
 
-    def term(self):
-        node = self.factor()
-        while True:
-            if self.match("MULTIPLY"):
-                right = self.factor()
-                node = ("*", node, right)
-            elif self.match("DIVIDE"):
-                right = self.factor()
-                node = ("/", node, right)
-            elif self.match("PERCENT"):
-                right = self.factor()
-                node = ("%", node, right)
-            else:
-                break
-        return node
+    # A full expression is a binary() call at the loosest precedence; the
+    # alias saves a wrapper frame for every argument, operand and statement
+    expression = binary
 
     def factor(self):
-        token = self.peek()
-        if token[0] == "AWAIT":
-            self.advance()
-            expr = self.factor()
-            return ("await_expr", expr)
-        if token[0] == "NUMBER":
-            self.advance()
-            return ("number", token[1])
-        elif token[0] == "IDENTIFIER":
-            name = token[1]
-            self.advance()
-            # Check for function call
-            if self.peek() and self.peek()[0] == "LPAREN":
-                self.advance()  # skip LPAREN
-                args = []
-                if self.peek() and self.peek()[0] != "RPAREN":
-                    while True:
-                        args.append(self.expression())
-                        if self.match("COMMA"):
-                            continue
-                        elif self.peek() and self.peek()[0] == "RPAREN":
-                            break
-                        else:
-                            self.error("Expected ',' or ')' in function call")
-                if not self.match("RPAREN"):
-                    self.error("Expected ')' after function call arguments")
-                return ("call", name, args)
-            return ("identifier", name)
-        elif token[0] == "STRING":
-            self.advance()
-            # Remove quotes
-            return ("string", token[1][1:-1])
-        elif token[0] == "LPAREN":
-            self.advance()
+        pos = self.pos
+        kinds = self._kinds
+        kind = kinds[pos]
+        # Names and numbers make up most operands, so test them first
+        if kind == _K_IDENTIFIER:
+            name = self._values[pos]
+            pos += 1
+            if kinds[pos] != _K_LPAREN:
+                self.pos = pos
+                return (_T_IDENTIFIER, name)
+            # Function call
+            pos += 1  # skip LPAREN
+            args = []
+            if kinds[pos] != _K_RPAREN:
+                self.pos = pos
+                expression = self.expression
+                while True:
+                    args.append(expression())
+                    pos = self.pos
+                    kind = kinds[pos]
+                    if kind == _K_COMMA:
+                        self.pos = pos + 1
+                    elif kind == _K_RPAREN:
+                        break
+                    else:
+                        self.error("Expected ',' or ')' in function call")
+            self.pos = pos + 1  # skip RPAREN
+            return (_T_CALL, name, args)
+        if kind == _K_NUMBER or kind == _K_STRING:
+            self.pos = pos + 1
+            return self._literal(kind, self._values[pos])
+        if kind == _K_LPAREN:
+            self.pos = pos + 1
             expr = self.expression()
-            if not self.match("RPAREN"):
+            if not self._match1(_K_RPAREN):
                 self.error("Expected ')'")
             return expr
-        elif token[0] == "LBRACKET":
+        if kind == _K_LBRACKET:
             return self.list_literal()
-        else:
-            self.error(f"Unexpected token: {token}")
+        if kind == _K_AWAIT:
+            self.pos = pos + 1
+            expr = self.factor()
+            return (_T_AWAIT_EXPR, expr)
+        if kind == _K_EOF:
+            self.error("Unexpected end of input")
+        self.error(f"Unexpected token: {self.tokens[pos]}")
 
     def list_literal(self):
-        self.match("LBRACKET")
+        self._match1(_K_LBRACKET)
         elements = []
-        if not self.match("RBRACKET"):
+        if not self._match1(_K_RBRACKET):
+            kinds = self._kinds
+            expression = self.expression
             while True:
-                elements.append(self.expression())
-                if self.match("COMMA"):
+                elements.append(expression())
+                pos = self.pos
+                kind = kinds[pos]
+                self.pos = pos + 1
+                if kind == _K_COMMA:
                     continue
-                elif self.match("RBRACKET"):
+                elif kind == _K_RBRACKET:
                     break
                 else:
                     raise SyntaxError("Expected ',' or ']' in list literal")
-        return ("list", elements)
+        return (_T_LIST, elements)
 
     def try_statement(self):
-        if not self.match("LBRACE"):
+        if not self._match1(_K_LBRACE):
             self.error("Expected '{' after 'try'")
         try_block = self.block()
         except_blocks = []
         finally_block = None
-        while self.match("EXCEPT"):
+        while self._match1(_K_EXCEPT):
             exc_type = None
             exc_var = None
             # Optional exception type
-            if self.peek() and self.peek().kind == "IDENTIFIER":
-                exc_type = self.match("IDENTIFIER")[1]
+            if self._kinds[self.pos] == _K_IDENTIFIER:
+                exc_type = self.match(_K_IDENTIFIER)[1]
             # Optional 'as' exc_var
-            if self.match("AS"):
-                var_token = self.match("IDENTIFIER")
+            if self._match1(_K_AS):
+                var_token = self.match(_K_IDENTIFIER)
                 if not var_token:
                     self.error("Expected variable name after 'as' in except block")
                 exc_var = var_token[1]
-            if not self.match("LBRACE"):
+            if not self._match1(_K_LBRACE):
                 self.error("Expected '{' after 'except' block")
             except_block = self.block()
             except_blocks.append((exc_type, exc_var, except_block))
-        if self.match("FINALLY"):
-            if not self.match("LBRACE"):
+        if self._match1(_K_FINALLY):
+            if not self._match1(_K_LBRACE):
                 self.error("Expected '{' after 'finally'")
             finally_block = self.block()
-        return ("try", try_block, except_blocks, finally_block)
+        return (_T_TRY, try_block, except_blocks, finally_block)
+
+    # Statement keyword -> parser method; statement() consumes the keyword
+    # before calling the method
+    _STMT_DISPATCH = {
+        _K_ASYNC: async_function_declaration,
+        _K_DEF: function_declaration,
+        _K_IF: if_statement,
+        _K_WHILE: while_statement,
+        _K_FOR: for_statement,
+        _K_WITH: with_statement,
+        _K_PRINT: print_statement,
+        _K_IMPORT: import_statement,
+        _K_RETURN: return_statement,
+        _K_AWAIT: await_statement,
+        _K_TRY: try_statement,
+        _K_RAISE: raise_statement,
+    }
+
+
+# --------------------
+# BYTECODE OPCODES
+# --------------------
+# The compiler flattens the AST into two-word instructions [opcode, arg] in a
+# single list, so the VM reads code[pc] and code[pc + 1] with no tuple
+# unpacking or per-node coroutine. arg indexes consts/names, is a jump
+# target, or is a count, depending on the opcode.
+# Loads, stores, jumps and calls
+_OP_LOAD_FAST = 0  # push the function local in slot arg
+_OP_LOAD_NAME = 1  # push env[names[arg]], falling back to the builtins
+_OP_CONST = 2  # push consts[arg]
+_OP_STORE_FAST = 3  # fast[arg] = pop()
+_OP_STORE_NAME = 4  # env[names[arg]] = pop()
+_OP_POP = 5
+_OP_JUMP = 6
+_OP_POP_JUMP_IF_FALSE = 7
+_OP_POP_JUMP_IF_TRUE = 8
+_OP_FOR_ITER = 9  # push next(iterator), or pop it and jump to arg
+_OP_CALL_BUILTIN = 10  # consts[arg] is (callable, argc)
+_OP_LOAD_FUNC = 11  # push the user function named names[arg]
+_OP_CALL_FUNC = 12  # call the function under arg arguments in a new frame
+_OP_RETURN = 13  # return pop() from the current frame
+_OP_RETURN_NONE = 14
+# Operators
+_OP_ADD = 15
+_OP_SUB = 16
+_OP_MUL = 17
+_OP_DIV = 18
+_OP_MOD = 19
+_OP_EQ = 20
+_OP_NE = 21
+_OP_LT = 22
+_OP_LE = 23
+_OP_GT = 24
+_OP_GE = 25
+_OP_IS = 26
+_OP_IS_NOT = 27
+_OP_IN = 28
+_OP_NOT_IN = 29
+_OP_NOT = 30
+_OP_JUMP_IF_FALSE_OR_POP = 31  # 'and': keep a falsy left operand
+_OP_JUMP_IF_TRUE_OR_POP = 32  # 'or': keep a truthy left operand
+_OP_AWAIT = 33  # await pop() if it is awaitable
+_OP_IMPORT = 34  # run the module in consts[arg] = (name, is_path)
+_OP_RUN_FILE = 35  # run pop() as a file sharing env; arg 1 = as a task
+_OP_EXC_DISPATCH = 36  # jump to consts[arg][type name of the top], or [None]
+# Opcodes from here on are run through _OP_HANDLERS rather than inline
+_OP_GET_ITER = 37
+_OP_BUILD_LIST = 38  # pop arg items into a list
+_OP_PRINT = 39  # print arg popped values
+_OP_MAKE_FUNCTION = 40  # bind the function Bytecode in consts[arg]
+_OP_RAISE = 41
+_OP_RERAISE = 42  # re-raise the exception a handler pushed
+_OP_STORE_TEMP = 43  # frame temp slots hold statement-level state
+_OP_LOAD_TEMP = 44
+_OP_MARK_STACK = 45  # temps[arg] = stack depth, for handlers to cut back to
+_OP_ENV_SNAPSHOT = 46  # temps[arg] = env.copy()
+_OP_ENV_REPLACE = 47  # make env equal to temps[arg] again
+_OP_SAVE_NAME = 48  # consts[arg] is (temp, name): temps[temp] = env[name]
+_OP_RESTORE_NAME = 49  # put back (or remove) the name _OP_SAVE_NAME saved
+_OP_CLOSE_TEMP = 50  # close temps[arg] if it has a close() method
+_OP_CALL_BOUND_BUILTIN = 51  # consts[arg] is (name, argc) of an instance built-in
+_OP_FAST_SNAPSHOT = 52  # temps[arg] = a copy of the fast slots
+_OP_FAST_REPLACE = 53  # put the fast slots back to temps[arg]
+_OP_FIRST_OPERATOR = _OP_ADD
+_OP_FIRST_HANDLED = _OP_GET_ITER
+_OP_COUNT = 54
+
+# Opcode for each binary operator tag ('and'/'or' compile to jumps)
+_BINARY_OPCODES = {
+    _T_PLUS: _OP_ADD,
+    _T_MINUS: _OP_SUB,
+    _T_MULTIPLY: _OP_MUL,
+    _T_DIVIDE: _OP_DIV,
+    _T_PERCENT: _OP_MOD,
+    _T_EQ: _OP_EQ,
+    _T_NEQ: _OP_NE,
+    _T_LT: _OP_LT,
+    _T_LE: _OP_LE,
+    _T_GT: _OP_GT,
+    _T_GE: _OP_GE,
+    _T_IS: _OP_IS,
+    _T_IS_NOT: _OP_IS_NOT,
+    _T_IN: _OP_IN,
+    _T_NOT_IN: _OP_NOT_IN,
+}
+
+# Binary operators the compiler evaluates when both operands are constants
+_FOLDABLE_OPERATORS = {
+    _T_PLUS: add,
+    _T_MINUS: sub,
+    _T_MULTIPLY: mul,
+    _T_DIVIDE: truediv,
+    _T_PERCENT: mod,
+    _T_EQ: eq,
+    _T_NEQ: ne,
+    _T_LT: lt,
+    _T_LE: le,
+    _T_GT: gt,
+    _T_GE: ge,
+    _T_IN: lambda left, right: left in right,
+    _T_NOT_IN: lambda left, right: left not in right,
+}
+# Logical operators folded by short-circuit rules rather than a function
+_FOLDABLE_LOGIC = frozenset({_T_NOT, _T_AND, _T_OR})
+# Longest string a folded expression may produce
+_FOLD_MAX_STRING = 4096
+
+# Opcodes whose arg is a jump target
+_JUMP_OPCODES = frozenset(
+    {
+        _OP_JUMP,
+        _OP_POP_JUMP_IF_FALSE,
+        _OP_POP_JUMP_IF_TRUE,
+        _OP_JUMP_IF_FALSE_OR_POP,
+        _OP_JUMP_IF_TRUE_OR_POP,
+        _OP_FOR_ITER,
+    }
+)
+
+# Statements that work on env as a whole; a function containing one keeps
+# its locals in env instead of fast slots
+_ENV_STATEMENTS = frozenset(
+    {
+        _T_WITH,
+        _T_IMPORT,
+        _T_RUN_STMT,
+        _T_RUN_ASYNC_STMT,
+        _T_FUNCTION_DECL,
+        _T_ASYNC_FUNCTION_DECL,
+    }
+)
+
+# Exception table entry kinds. Each entry is (start, end, kind, target, arg)
+# and covers instructions start <= pc < end; entries are innermost-first.
+_H_EXCEPT = 0  # jump to target with the exception pushed (Exception only)
+_H_FINALLY = 1  # same, for any exception; the handler code re-raises
+_H_BUILTIN = 2  # re-wrap as a built-in error for the call named arg
+_H_RESTORE = 3  # put back the env snapshot in temps[arg], keep unwinding
+_H_RESTORE_FAST = 4  # same for the fast slots snapshot in temps[arg]
+
+
+# --------------------
+# BYTECODE CLASS
+# --------------------
+class Bytecode:
+    # One compiled block: a module body or a function body
+    __slots__ = (
+        "name",
+        "code",
+        "consts",
+        "names",
+        "handlers",
+        "ntemps",
+        "params",
+        "is_async",
+        "varnames",
+        "slots",
+        "jit",
+    )
+
+    def __init__(self, name, params=(), is_async=False, varnames=()):
+        self.name = name
+        self.code = []
+        self.consts = []
+        self.names = []
+        self.handlers = []
+        self.ntemps = 0
+        self.params = tuple(params)
+        self.is_async = is_async
+        # Names of the fast local slots; empty when locals live in env. A
+        # function with slots has its params in the first len(params) slots.
+        self.varnames = tuple(varnames)
+        self.slots = {name: slot for slot, name in enumerate(self.varnames)}
+        # Dispatcher from _numeric_function(), for functions run compiled
+        self.jit = None
+
+    def __repr__(self):
+        return f"<Bytecode {self.name}, {len(self.code) // 2} instructions>"
+
+
+# --------------------
+# FRAME CLASS
+# --------------------
+class _Frame:
+    # Execution state of one running Bytecode
+    __slots__ = ("code", "env", "fast", "parent", "stack", "temps", "pc")
+
+    def __init__(self, code, env, args=(), parent=None):
+        self.code = code
+        self.env = env
+        # A frame with fast slots never stores into env, so it runs on its
+        # caller's env in place; parent is then the caller if that has fast
+        # slots of its own, whose bound locals shadow env
+        self.parent = parent
+        self.stack = []
+        self.temps = [None] * code.ntemps
+        self.pc = 0
+        # Missing arguments are bound to None, extra ones dropped
+        params = code.params
+        varnames = code.varnames
+        if varnames:
+            nparams = len(params)
+            fast = list(args) if len(args) == nparams else list(args[:nparams])
+            if len(fast) < nparams:
+                fast += [None] * (nparams - len(fast))
+            if len(varnames) > nparams:
+                fast += [_UNBOUND] * (len(varnames) - nparams)
+            self.fast = fast
+        else:
+            self.fast = None
+            for i, param in enumerate(params):
+                env[param] = args[i] if i < len(args) else None
+
+
+# Returned by next() when a for loop's iterator runs out
+_EXHAUSTED = object()
+# Compiler.constant() result for expressions that are not constant
+_NOT_CONSTANT = object()
+# Fast local slot not assigned yet: reads fall back to the caller's names
+_UNBOUND = object()
+
+
+# --------------------
+# OPCODE HANDLERS
+# --------------------
+# Opcodes that are rare in loops: the VM calls _OP_HANDLERS[op](interp,
+# frame, arg) for these so the inline chain only tests the hot ones
+def _op_get_iter(interp, frame, arg):
+    frame.stack[-1] = iter(frame.stack[-1])
+
+
+def _op_build_list(interp, frame, arg):
+    stack = frame.stack
+    if arg:
+        items = stack[-arg:]
+        del stack[-arg:]
+        stack.append(items)
+    else:
+        stack.append([])
+
+
+def _op_print(interp, frame, arg):
+    stack = frame.stack
+    if arg:
+        values = stack[-arg:]
+        del stack[-arg:]
+        print(*values)
+    else:
+        print()
+
+
+def _op_make_function(interp, frame, arg):
+    func = frame.code.consts[arg]
+    interp.functions[func.name] = func
+    frame.env[func.name] = interp._closure(func, frame.env)
+
+
+def _op_raise(interp, frame, arg):
+    raise frame.stack.pop()
+
+
+def _op_store_temp(interp, frame, arg):
+    frame.temps[arg] = frame.stack.pop()
+
+
+def _op_load_temp(interp, frame, arg):
+    frame.stack.append(frame.temps[arg])
+
+
+def _op_mark_stack(interp, frame, arg):
+    frame.temps[arg] = len(frame.stack)
+
+
+def _op_env_snapshot(interp, frame, arg):
+    frame.temps[arg] = frame.env.copy()
+
+
+def _op_save_name(interp, frame, arg):
+    temp, name = frame.code.consts[arg]
+    frame.temps[temp] = frame.env.get(name, _UNBOUND)
+
+
+def _op_env_replace(interp, frame, arg):
+    frame.env.clear()
+    frame.env.update(frame.temps[arg])
+
+
+def _op_restore_name(interp, frame, arg):
+    temp, name = frame.code.consts[arg]
+    value = frame.temps[temp]
+    if value is _UNBOUND:
+        frame.env.pop(name, None)
+    else:
+        frame.env[name] = value
+
+
+def _op_fast_snapshot(interp, frame, arg):
+    frame.temps[arg] = frame.fast[:]
+
+
+def _op_fast_replace(interp, frame, arg):
+    # In place: the running VM loop holds the list
+    frame.fast[:] = frame.temps[arg]
+
+
+def _op_close_temp(interp, frame, arg):
+    resource = frame.temps[arg]
+    if hasattr(resource, "close"):
+        resource.close()
+
+
+def _op_call_bound_builtin(interp, frame, arg):
+    name, argc = frame.code.consts[arg]
+    stack = frame.stack
+    if argc:
+        args = stack[-argc:]
+        del stack[-argc:]
+        stack.append(interp.builtins[name](*args))
+    else:
+        stack.append(interp.builtins[name]())
+
+
+_OP_HANDLERS = [None] * _OP_COUNT
+_OP_HANDLERS[_OP_GET_ITER] = _op_get_iter
+_OP_HANDLERS[_OP_BUILD_LIST] = _op_build_list
+_OP_HANDLERS[_OP_PRINT] = _op_print
+_OP_HANDLERS[_OP_MAKE_FUNCTION] = _op_make_function
+_OP_HANDLERS[_OP_RAISE] = _op_raise
+_OP_HANDLERS[_OP_RERAISE] = _op_raise
+_OP_HANDLERS[_OP_STORE_TEMP] = _op_store_temp
+_OP_HANDLERS[_OP_LOAD_TEMP] = _op_load_temp
+_OP_HANDLERS[_OP_MARK_STACK] = _op_mark_stack
+_OP_HANDLERS[_OP_ENV_SNAPSHOT] = _op_env_snapshot
+_OP_HANDLERS[_OP_FAST_SNAPSHOT] = _op_fast_snapshot
+_OP_HANDLERS[_OP_FAST_REPLACE] = _op_fast_replace
+_OP_HANDLERS[_OP_ENV_REPLACE] = _op_env_replace
+_OP_HANDLERS[_OP_SAVE_NAME] = _op_save_name
+_OP_HANDLERS[_OP_RESTORE_NAME] = _op_restore_name
+_OP_HANDLERS[_OP_CLOSE_TEMP] = _op_close_temp
+_OP_HANDLERS[_OP_CALL_BOUND_BUILTIN] = _op_call_bound_builtin
+
+
+# --------------------
+# COMPILER CLASS
+# --------------------
+class _Region:
+    # A protected instruction range of the statement being compiled. It is
+    # split into pieces around inlined return cleanup, which it must not cover.
+    __slots__ = ("kind", "target", "arg", "start", "pieces", "cleanup")
+
+    def __init__(self, kind, arg, start, cleanup=None):
+        self.kind = kind
+        self.target = None
+        self.arg = arg
+        self.start = start
+        self.pieces = []
+        self.cleanup = cleanup  # emits this statement's exit code for 'return'
+
+    def close(self, pc):
+        if self.start is not None and self.start < pc:
+            self.pieces.append((self.start, pc))
+        self.start = None
+
+
+class Compiler:
+    # Turns parser AST into Bytecode. Calls are resolved against the built-in
+    # names at compile time, matching the interpreter's builtins-first lookup.
+    def __init__(self, builtins):
+        self.builtins = builtins
+        self.builtin_names = frozenset(builtins)
+        self.bc = None
+        self._const_index = None
+        self._name_index = None
+        self._regions = None
+        self._slots = None
+        self._constants = None
+
+    def compile(self, block, name="<module>"):
+        # constant() results by id(node), so nested operators are only
+        # examined once; the AST outlives the compile, keeping ids unique
+        self._constants = {}
+        try:
+            return self._compile_body(block, name)
+        finally:
+            self._constants = None
+
+    def _compile_body(self, block, name, params=(), is_async=False, varnames=()):
+        saved = (
+            self.bc,
+            self._const_index,
+            self._name_index,
+            self._regions,
+            self._slots,
+        )
+        self.bc = Bytecode(name, params, is_async, varnames)
+        self._const_index = {}
+        self._name_index = {}
+        self._regions = []
+        self._slots = {name: slot for slot, name in enumerate(varnames)}
+        try:
+            self.block(block)
+            self.emit(_OP_RETURN_NONE)
+            self._thread_jumps()
+            return self.bc
+        finally:
+            (
+                self.bc,
+                self._const_index,
+                self._name_index,
+                self._regions,
+                self._slots,
+            ) = saved
+
+    def _local_names(self, block, names):
+        # Add the names block assigns to names (an ordered dict). Returns
+        # False if block needs its locals in a real env dict: with, import,
+        # run and nested functions all work on env itself.
+        for stmt in block:
+            tag = stmt[0]
+            if tag is _T_ASSIGN:
+                names[stmt[1]] = None
+            elif tag is _T_IF:
+                blocks = [stmt[2]] + [body for _, body in stmt[3]]
+                if stmt[4]:
+                    blocks.append(stmt[4])
+                for body in blocks:
+                    if not self._local_names(body, names):
+                        return False
+            elif tag is _T_WHILE:
+                if not self._local_names(stmt[2], names):
+                    return False
+            elif tag is _T_FOR:
+                names[stmt[1]] = None
+                if not self._local_names(stmt[3], names):
+                    return False
+            elif tag is _T_TRY:
+                if not self._local_names(stmt[1], names):
+                    return False
+                for _, exc_var, exc_block in stmt[2]:
+                    if exc_var:
+                        names[exc_var] = None
+                    if not self._local_names(exc_block, names):
+                        return False
+                if stmt[3] and not self._local_names(stmt[3], names):
+                    return False
+            elif tag in _ENV_STATEMENTS:
+                return False
+        return True
+
+    def _thread_jumps(self):
+        # Point jumps that land on an unconditional jump straight at its
+        # target, e.g. the end of an if inside a loop at the loop's top
+        code = self.bc.code
+        for pc in range(0, len(code), 2):
+            if code[pc] in _JUMP_OPCODES:
+                target = code[pc + 1]
+                seen = 0
+                while code[target] == _OP_JUMP and seen < 8:
+                    target = code[target + 1]
+                    seen += 1
+                code[pc + 1] = target
+
+    # -- emission helpers --------------------------------------------------
+    def emit(self, op, arg=0):
+        code = self.bc.code
+        code.append(op)
+        code.append(arg)
+        return len(code) - 1  # index of arg, for patch()
+
+    def patch(self, index, target=None):
+        self.bc.code[index] = len(self.bc.code) if target is None else target
+
+    def pc(self):
+        return len(self.bc.code)
+
+    def const(self, value):
+        key = (type(value), value)
+        if key[0] is float:
+            # 0.0 == -0.0, but a folded -0.0 must keep its sign
+            key = (float, value, math.copysign(1.0, value))
+        index = self._const_index.get(key)
+        if index is None:
+            index = self._const_index[key] = len(self.bc.consts)
+            self.bc.consts.append(value)
+        return index
+
+    def name(self, name):
+        index = self._name_index.get(name)
+        if index is None:
+            index = self._name_index[name] = len(self.bc.names)
+            self.bc.names.append(name)
+        return index
+
+    def temp(self):
+        self.bc.ntemps += 1
+        return self.bc.ntemps - 1
+
+    def push_region(self, kind, arg, cleanup=None):
+        region = _Region(kind, arg, self.pc(), cleanup)
+        self._regions.append(region)
+        return region
+
+    def pop_region(self, region):
+        # Close region and record its pieces; inner regions are popped first,
+        # which keeps the exception table innermost-first
+        assert self._regions.pop() is region
+        region.close(self.pc())
+        if region.target is None:
+            region.target = self.pc()
+        for start, end in region.pieces:
+            self.bc.handlers.append(
+                (start, end, region.kind, region.target, region.arg)
+            )
+
+    # -- statements --------------------------------------------------------
+    def block(self, stmts):
+        for stmt in stmts:
+            handler = self._STMT.get(stmt[0])
+            if handler is None:
+                # A bare expression node used as a statement
+                self.expr(stmt)
+                self.emit(_OP_POP)
+            else:
+                handler(self, stmt)
+
+    def assign(self, node):
+        self.expr(node[2])
+        self.store(node[1])
+
+    def store(self, name):
+        slot = self._slots.get(name)
+        if slot is None:
+            self.emit(_OP_STORE_NAME, self.name(name))
+        else:
+            self.emit(_OP_STORE_FAST, slot)
+
+    def function_decl(self, node):
+        _, name, params, body = node
+        is_async = node[0] is _T_ASYNC_FUNCTION_DECL
+        varnames = dict.fromkeys(params)
+        if len(varnames) < len(params) or not self._local_names(body, varnames):
+            varnames = ()
+        func = self._compile_body(body, name, params, is_async, varnames)
+        if _JIT_ENABLED and not is_async:
+            func.jit = _numeric_function(params, body)
+        self.emit(_OP_MAKE_FUNCTION, self.const(func))
+
+    def print_stmt(self, node):
+        for arg in node[1]:
+            self.expr(arg)
+        self.emit(_OP_PRINT, len(node[1]))
+
+    def expr_stmt(self, node):
+        self.expr(node[1])
+        self.emit(_OP_POP)
+
+    def if_stmt(self, node):
+        # Arms whose condition is a constant are decided here: a false one
+        # is dropped, a true one ends the chain
+        _, cond, then_block, elif_blocks, else_block = node
+        end_jumps = []
+        for test, body in [(cond, then_block)] + list(elif_blocks):
+            value = self.constant(test)
+            if value is _NOT_CONSTANT:
+                self.expr(test)
+                skip = self.emit(_OP_POP_JUMP_IF_FALSE)
+                self.block(body)
+                end_jumps.append(self.emit(_OP_JUMP))
+                self.patch(skip)
+            elif value:
+                self.block(body)
+                break
+        else:
+            if else_block:
+                self.block(else_block)
+        for jump in end_jumps:
+            self.patch(jump)
+
+    def while_stmt(self, node):
+        # The condition is tested once on entry and again at the bottom of
+        # the body, so each iteration takes one conditional jump
+        _, cond, body = node
+        self.expr(cond)
+        exit_jump = self.emit(_OP_POP_JUMP_IF_FALSE)
+        top = self.pc()
+        self.block(body)
+        self.expr(cond)
+        self.emit(_OP_POP_JUMP_IF_TRUE, top)
+        self.patch(exit_jump)
+
+    def for_stmt(self, node):
+        _, var, iterable, body = node
+        self.expr(iterable)
+        self.emit(_OP_GET_ITER)
+        top = self.pc()
+        exit_jump = self.emit(_OP_FOR_ITER)
+        self.store(var)
+        self.block(body)
+        self.emit(_OP_JUMP, top)
+        self.patch(exit_jump)
+
+    def import_stmt(self, node):
+        self.emit(_OP_IMPORT, self.const((node[1], node[2])))
+        self.emit(_OP_POP)
+
+    def with_stmt(self, node):
+        _, resource, var, body = node
+        res = self.temp()
+        saved = self.const((self.temp(), var))
+        mark = self.temp()
+        self.expr(resource)
+        self.emit(_OP_STORE_TEMP, res)
+        self.emit(_OP_SAVE_NAME, saved)
+        self.emit(_OP_LOAD_TEMP, res)
+        self.emit(_OP_STORE_NAME, self.name(var))
+        self.emit(_OP_MARK_STACK, mark)
+
+        def leave():
+            # Close the resource, then give the variable back the value it
+            # had before the block, or remove it if it was unset
+            self.emit(_OP_CLOSE_TEMP, res)
+            self.emit(_OP_RESTORE_NAME, saved)
+
+        region = self.push_region(_H_FINALLY, mark, leave)
+        self.block(body)
+        region.close(self.pc())
+        leave()
+        done = self.emit(_OP_JUMP)
+        # On an exception only the resource is closed
+        region.target = self.pc()
+        self.pop_region(region)
+        self.emit(_OP_CLOSE_TEMP, res)
+        self.emit(_OP_RERAISE)
+        self.patch(done)
+
+    def return_stmt(self, node):
+        self.expr(node[1])
+        # Leave every enclosing protected statement, innermost first: stop
+        # covering the exit code with its own range, then run its cleanup
+        # with only the statements around it still active
+        regions = self._regions
+        unwound = []
+        for depth in range(len(regions) - 1, -1, -1):
+            region = regions[depth]
+            region.close(self.pc())
+            unwound.append(region)
+            if region.cleanup is not None:
+                self._regions = regions[:depth]
+                region.cleanup()
+                self._regions = regions
+        self.emit(_OP_RETURN)
+        for region in unwound:
+            region.start = self.pc()
+
+    def await_stmt(self, node):
+        self.expr(node[1])
+        self.emit(_OP_AWAIT)
+        self.emit(_OP_POP)
+
+    def run_stmt(self, node):
+        self.expr(node[1])
+        self.emit(_OP_RUN_FILE, 1 if node[0] is _T_RUN_ASYNC_STMT else 0)
+        self.emit(_OP_POP)
+
+    def try_stmt(self, node):
+        _, try_block, except_blocks, finally_block = node
+        mark = self.temp()
+        self.emit(_OP_MARK_STACK, mark)
+        final = None
+        if finally_block:
+            final = self.push_region(
+                _H_FINALLY, mark, lambda: self.block(finally_block)
+            )
+        if except_blocks:
+            guard = self.push_region(_H_EXCEPT, mark)
+            self.block(try_block)
+            guard.close(self.pc())
+            done = self.emit(_OP_JUMP)
+            guard.target = self.pc()
+            self.pop_region(guard)
+            # Clause address by exception type name; None maps to the bare
+            # except, or to a re-raise when there is none. The first clause
+            # for a name wins, and a bare except hides the clauses after it.
+            table = {}
+            self.bc.consts.append(table)
+            self.emit(_OP_EXC_DISPATCH, len(self.bc.consts) - 1)
+            ends = []
+            for exc_type, exc_var, exc_block in except_blocks:
+                if exc_type in table:
+                    continue
+                table[exc_type] = self.pc()
+                self.except_clause(exc_var, exc_block)
+                ends.append(self.emit(_OP_JUMP))
+                if exc_type is None:
+                    break
+            else:
+                table[None] = self.pc()
+                self.emit(_OP_RERAISE)  # No clause matched
+            self.patch(done)
+            for jump in ends:
+                self.patch(jump)
+        else:
+            self.block(try_block)
+        if final is not None:
+            final.close(self.pc())
+            self.block(finally_block)
+            done = self.emit(_OP_JUMP)
+            final.target = self.pc()
+            self.pop_region(final)
+            # While an exception is pending the finally block runs with the
+            # exception kept aside, then re-raises it. A return in the block
+            # drops the exception and returns, as in Python.
+            exc = self.temp()
+            self.emit(_OP_STORE_TEMP, exc)
+            self.block(finally_block)
+            self.emit(_OP_LOAD_TEMP, exc)
+            self.emit(_OP_RERAISE)
+            self.patch(done)
+
+    def except_clause(self, exc_var, body):
+        # The clause runs on a copy of the environment: its assignments, and
+        # the exception variable, are dropped once it finishes. In a function
+        # with fast slots those are all slots, so only the slots are copied.
+        if self._slots:
+            take, restore, kind = _OP_FAST_SNAPSHOT, _OP_FAST_REPLACE, _H_RESTORE_FAST
+        else:
+            take, restore, kind = _OP_ENV_SNAPSHOT, _OP_ENV_REPLACE, _H_RESTORE
+        snapshot = self.temp()
+        self.emit(take, snapshot)
+        if exc_var:
+            self.store(exc_var)
+        else:
+            self.emit(_OP_POP)
+        scope = self.push_region(kind, snapshot, lambda: self.emit(restore, snapshot))
+        self.block(body)
+        self.pop_region(scope)
+        self.emit(restore, snapshot)
+
+    def raise_stmt(self, node):
+        self.expr(node[1])
+        self.emit(_OP_RAISE)
+
+    _STMT = {
+        _T_ASSIGN: assign,
+        _T_FUNCTION_DECL: function_decl,
+        _T_ASYNC_FUNCTION_DECL: function_decl,
+        _T_PRINT: print_stmt,
+        _T_EXPR_STMT: expr_stmt,
+        _T_IF: if_stmt,
+        _T_WHILE: while_stmt,
+        _T_FOR: for_stmt,
+        _T_IMPORT: import_stmt,
+        _T_WITH: with_stmt,
+        _T_RETURN: return_stmt,
+        _T_AWAIT_STMT: await_stmt,
+        _T_RUN_STMT: run_stmt,
+        _T_RUN_ASYNC_STMT: run_stmt,
+        _T_TRY: try_stmt,
+        _T_RAISE: raise_stmt,
+    }
+
+    # -- expressions -------------------------------------------------------
+    def constant(self, node):
+        # Value of an expression made only of literals and foldable
+        # operators, or _NOT_CONSTANT. Operations that would raise are
+        # left to run (and fail) at runtime.
+        tag = node[0]
+        if tag is _T_NUMBER or tag is _T_STRING:
+            return node[1]
+        if tag not in _FOLDABLE_OPERATORS and tag not in _FOLDABLE_LOGIC:
+            return _NOT_CONSTANT
+        value = self._constants.get(id(node), self)
+        if value is self:
+            value = self._constants[id(node)] = self._fold(node)
+        return value
+
+    def _fold(self, node):
+        tag = node[0]
+        if tag is _T_NOT:
+            value = self.constant(node[1])
+            return value if value is _NOT_CONSTANT else not value
+        if tag is _T_AND or tag is _T_OR:
+            # Like the jumps they compile to: the deciding operand is the value
+            left = self.constant(node[1])
+            if left is _NOT_CONSTANT or (not left if tag is _T_AND else left):
+                return left
+            return self.constant(node[2])
+        operator = _FOLDABLE_OPERATORS[tag]
+        _, left, right = node
+        left = self.constant(left)
+        if left is _NOT_CONSTANT:
+            return _NOT_CONSTANT
+        right = self.constant(right)
+        if right is _NOT_CONSTANT:
+            return _NOT_CONSTANT
+        if isinstance(left, str) or isinstance(right, str):
+            # Keep string repetition from building huge constants
+            if tag is _T_MULTIPLY:
+                count = right if isinstance(left, str) else left
+                longest = len(left) if isinstance(left, str) else len(right)
+                if isinstance(count, int) and count * longest > _FOLD_MAX_STRING:
+                    return _NOT_CONSTANT
+        try:
+            return operator(left, right)
+        except Exception:
+            return _NOT_CONSTANT
+
+    def expr(self, node):
+        tag = node[0]
+        if tag in _FOLDABLE_OPERATORS or tag in _FOLDABLE_LOGIC:
+            value = self.constant(node)
+            if value is not _NOT_CONSTANT:
+                self.emit(_OP_CONST, self.const(value))
+                return
+        if tag is _T_IDENTIFIER:
+            slot = self._slots.get(node[1])
+            if slot is None:
+                self.emit(_OP_LOAD_NAME, self.name(node[1]))
+            else:
+                self.emit(_OP_LOAD_FAST, slot)
+        elif tag is _T_NUMBER or tag is _T_STRING:
+            self.emit(_OP_CONST, self.const(node[1]))
+        elif tag is _T_CALL:
+            self.call(node)
+        elif tag in _BINARY_OPCODES:
+            _, left, right = node
+            self.expr(left)
+            self.expr(right)
+            self.emit(_BINARY_OPCODES[tag])
+        elif tag is _T_AND or tag is _T_OR:
+            _, left, right = node
+            value = self.constant(left)
+            if value is not _NOT_CONSTANT:
+                # A literal left operand decides statically which side is
+                # the result; the other side is never evaluated
+                if not value if tag is _T_AND else value:
+                    self.emit(_OP_CONST, self.const(value))
+                else:
+                    self.expr(right)
+                return
+            self.expr(left)
+            jump = self.emit(
+                _OP_JUMP_IF_FALSE_OR_POP if tag is _T_AND else _OP_JUMP_IF_TRUE_OR_POP
+            )
+            self.expr(right)
+            self.patch(jump)
+        elif tag is _T_NOT:
+            self.expr(node[1])
+            self.emit(_OP_NOT)
+        elif tag is _T_LIST:
+            for element in node[1]:
+                self.expr(element)
+            self.emit(_OP_BUILD_LIST, len(node[1]))
+        elif tag is _T_AWAIT_EXPR:
+            self.expr(node[1])
+            self.emit(_OP_AWAIT)
+        else:
+            raise RuntimeError(f"Unknown AST node: {node}")
+
+    def call(self, node):
+        _, func, args = node
+        if func in self.builtin_names:
+            # Errors raised while evaluating the arguments or in the call
+            # itself are reported as coming from this built-in
+            region = self.push_region(_H_BUILTIN, func)
+            for arg in args:
+                self.expr(arg)
+            # Built-ins shared by every interpreter are bound into the
+            # code; compiled modules are cached across interpreters, so
+            # instance-bound ones are looked up by name when called
+            static = _STATIC_BUILTINS.get(func)
+            if static is not None and self.builtins[func] is static:
+                self.emit(_OP_CALL_BUILTIN, self.const((static, len(args))))
+            else:
+                self.emit(_OP_CALL_BOUND_BUILTIN, self.const((func, len(args))))
+            self.pop_region(region)
+        else:
+            self.emit(_OP_LOAD_FUNC, self.name(func))
+            for arg in args:
+                self.expr(arg)
+            self.emit(_OP_CALL_FUNC, len(args))
+
+
+# --------------------
+# NUMERIC BUILT-INS
+# --------------------
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+_HAS_NUMBA = find_spec("numba") is not None
+
+# Numba is only used when VLANG_JIT=1 is set: importing it costs more than
+# a short script saves, and compiled code works on 64-bit machine numbers
+_JIT_ENABLED = _HAS_NUMBA and os.environ.get("VLANG_JIT") == "1"
+
+
+def _numeric_jit(int_limit):
+    """
+    Compile a one-argument numeric built-in with Numba when VLANG_JIT=1.
+    Numba is only imported on the first call and compiled code is cached on
+    disk. Only floats and ints with abs() below int_limit, for which the
+    machine result matches Python's, take the compiled path; everything
+    else runs the plain Python version.
+    """
+
+    def decorate(func):
+        if not _JIT_ENABLED:
+            return func
+        compiled = None
+
+        def dispatch(*args):
+            nonlocal compiled
+            if len(args) == 1:
+                arg = args[0]
+                if type(arg) is float or (
+                    type(arg) is int and -int_limit < arg < int_limit
+                ):
+                    if compiled is None:
+                        from numba import njit
+
+                        compiled = njit(cache=True)(func)
+                    return compiled(arg)
+            return func(*args)
+
+        dispatch.__name__ = func.__name__
+        return dispatch
+
+    return decorate
+
+
+@_numeric_jit(2**63)
+def _is_prime(n):
+    if n <= 1:
+        return False
+    for i in range(2, int(n**0.5) + 1):
+        if n % i == 0:
+            return False
+    return True
+
+
+# x * x stays inside int64 only while abs(x) < 2**31.5
+@_numeric_jit(2**31)
+def _square(x):
+    return float(x * x)
+
+
+# --------------------
+# NUMERIC FUNCTION JIT
+# --------------------
+# User functions that only do arithmetic on numbers can be translated to
+# Python and compiled with Numba when VLANG_JIT=1 is set. Compiled code uses
+# 64-bit machine integers, so integer +, -, * and abs() go through checked
+# helpers; on overflow the call is run again by the interpreter, which the
+# body allows because it has no side effects.
+
+# Returned by a compiled function's dispatcher when the interpreter has to
+# run the call instead
+_NOT_JITTED = object()
+
+# Built-ins compiled code may call. The math functions are left out: Numba
+# returns nan or inf where Python raises on a domain or range error.
+_JIT_BUILTINS = frozenset({"abs"})
+
+_JIT_ARITHMETIC = frozenset({_T_PLUS, _T_MINUS, _T_MULTIPLY, _T_PERCENT})
+_JIT_COMPARISONS = frozenset({_T_EQ, _T_NEQ, _T_LT, _T_LE, _T_GT, _T_GE})
+
+
+# The checks come before the operation: Numba's integer arithmetic may not
+# wrap, so LLVM is free to fold a test on a wrapped result away.
+def _jit_add(a, b):
+    if (b > 0 and a > _INT64_MAX - b) or (b < 0 and a < _INT64_MIN - b):
+        raise OverflowError()
+    return a + b
+
+
+def _jit_sub(a, b):
+    if (b < 0 and a > _INT64_MAX + b) or (b > 0 and a < _INT64_MIN + b):
+        raise OverflowError()
+    return a - b
+
+
+def _jit_mul(a, b):
+    # The float product is within a hair of the exact one; products near
+    # the int64 limits are refused rather than tested exactly
+    if abs(float(a) * float(b)) >= 2.0**62:
+        raise OverflowError()
+    return a * b
+
+
+def _jit_abs(a):
+    if a == _INT64_MIN:
+        raise OverflowError()
+    return abs(a)
+
+
+# Checked versions of the integer operations, by operator tag; "abs" for the
+# built-in. Compiled with Numba the first time a function needs them.
+_JIT_CHECKED = {
+    _T_PLUS: _jit_add,
+    _T_MINUS: _jit_sub,
+    _T_MULTIPLY: _jit_mul,
+    "abs": _jit_abs,
+}
+_jit_helpers = None
+
+
+def _jit_namespace():
+    # Globals for exec()ing a translated function: the compiled helpers
+    global _jit_helpers
+    if _jit_helpers is None:
+        from numba import njit
+
+        _jit_helpers = {func.__name__: njit(func) for func in _JIT_CHECKED.values()}
+    return dict(_jit_helpers)
+
+
+_JIT_OPERATORS = {
+    _T_PLUS: "+",
+    _T_MINUS: "-",
+    _T_MULTIPLY: "*",
+    _T_DIVIDE: "/",
+    _T_PERCENT: "%",
+    _T_EQ: "==",
+    _T_NEQ: "!=",
+    _T_LT: "<",
+    _T_LE: "<=",
+    _T_GT: ">",
+    _T_GE: ">=",
+    _T_AND: "and",
+    _T_OR: "or",
+}
+
+
+class _NotNumeric(Exception):
+    # The function body uses something compiled code cannot express
+    pass
+
+
+class _NumericSource:
+    # Translates a function body to Python source. Every name it reads must
+    # be a parameter or assigned on every path before the read, so the
+    # Python version never meets a name VirtoLang would have looked up in
+    # the caller; the body must end in a return on every path. Operations
+    # whose ids are in checked use the overflow-checked helpers.
+    def __init__(self, checked=frozenset()):
+        self.lines = []
+        self.checked = checked
+        # ids of the statements translated; the rest are unreachable
+        self.reached = set()
+
+    def function(self, params, body):
+        if len(set(params)) < len(params):
+            raise _NotNumeric()
+        args = ", ".join(f"v_{param}" for param in params)
+        self.lines.append(f"def function({args}):")
+        if self.block(body, frozenset(params), 1) is not None:
+            raise _NotNumeric()  # Falls off the end and returns None
+        return "\n".join(self.lines)
+
+    def block(self, stmts, bound, depth):
+        # Emit stmts and return the names bound after them, or None when
+        # they never fall through
+        start = len(self.lines)
+        for stmt in stmts:
+            self.reached.add(id(stmt))
+            bound = self.stmt(stmt, bound, depth)
+            if bound is None:
+                break  # Anything after a return is unreachable
+        if len(self.lines) == start:
+            self.emit(depth, "pass")
+        return bound
+
+    def emit(self, depth, line):
+        self.lines.append("    " * depth + line)
+
+    def stmt(self, node, bound, depth):
+        tag = node[0]
+        if tag is _T_ASSIGN:
+            self.emit(depth, f"v_{node[1]} = {self.expr(node[2], bound)}")
+            return bound | {node[1]}
+        if tag is _T_RETURN:
+            self.emit(depth, f"return {self.expr(node[1], bound)}")
+            return None
+        if tag is _T_IF:
+            _, cond, then_block, elif_blocks, else_block = node
+            self.emit(depth, f"if {self.expr(cond, bound)}:")
+            branches = [self.block(then_block, bound, depth + 1)]
+            for test, body in elif_blocks:
+                self.emit(depth, f"elif {self.expr(test, bound)}:")
+                branches.append(self.block(body, bound, depth + 1))
+            if else_block:
+                self.emit(depth, "else:")
+                branches.append(self.block(else_block, bound, depth + 1))
+            else:
+                branches.append(bound)
+            live = [names for names in branches if names is not None]
+            return frozenset.intersection(*live) if live else None
+        if tag is _T_WHILE:
+            self.emit(depth, f"while {self.expr(node[1], bound)}:")
+            self.block(node[2], bound, depth + 1)
+            return bound
+        if tag is _T_FOR:
+            _, var, iterable, body = node
+            if iterable[0] is not _T_CALL or iterable[1] != "range":
+                raise _NotNumeric()
+            if not 1 <= len(iterable[2]) <= 3:
+                raise _NotNumeric()
+            args = ", ".join(self.expr(arg, bound) for arg in iterable[2])
+            self.emit(depth, f"for v_{var} in range({args}):")
+            self.block(body, bound | {var}, depth + 1)
+            return bound
+        raise _NotNumeric()
+
+    def expr(self, node, bound):
+        tag = node[0]
+        if tag is _T_NUMBER:
+            value = node[1]
+            if type(value) is int and not _INT64_MIN <= value <= _INT64_MAX:
+                raise _NotNumeric()
+            if type(value) is not int and type(value) is not float:
+                raise _NotNumeric()
+            return repr(value)
+        if tag is _T_IDENTIFIER:
+            if node[1] not in bound:
+                raise _NotNumeric()
+            return f"v_{node[1]}"
+        if tag is _T_NOT:
+            return f"(not {self.expr(node[1], bound)})"
+        if tag is _T_CALL:
+            _, func, args = node
+            if func not in _JIT_BUILTINS:
+                raise _NotNumeric()
+            args = ", ".join(self.expr(arg, bound) for arg in args)
+            if id(node) in self.checked:
+                func = _JIT_CHECKED[func].__name__
+            return f"{func}({args})"
+        operator = _JIT_OPERATORS.get(tag)
+        if operator is None:
+            raise _NotNumeric()
+        left = self.expr(node[1], bound)
+        right = self.expr(node[2], bound)
+        if id(node) in self.checked:
+            return f"{_JIT_CHECKED[tag].__name__}({left}, {right})"
+        return f"({left} {operator} {right})"
+
+
+class _NumericTypes:
+    # Checks that a translated body keeps every name, and every return, to
+    # one of int, float or bool for the given argument types. Numba would
+    # otherwise unify int and float to float and change printed results.
+    # Collects the ids of the integer operations that can overflow.
+    def __init__(self, params, arg_types, reached):
+        self.names = dict(zip(params, arg_types))
+        self.returns = None
+        self.reached = reached
+        self.checked = set()
+
+    def check(self, body):
+        try:
+            self.block(body)
+        except _NotNumeric:
+            return False
+        return True
+
+    def block(self, stmts):
+        for stmt in stmts:
+            if id(stmt) not in self.reached:
+                break
+            tag = stmt[0]
+            if tag is _T_ASSIGN:
+                self.bind(stmt[1], self.expr(stmt[2]))
+            elif tag is _T_RETURN:
+                kind = self.expr(stmt[1])
+                if self.returns is None:
+                    self.returns = kind
+                elif self.returns is not kind:
+                    raise _NotNumeric()
+            elif tag is _T_IF:
+                _, cond, then_block, elif_blocks, else_block = stmt
+                self.expr(cond)
+                self.block(then_block)
+                for test, body in elif_blocks:
+                    self.expr(test)
+                    self.block(body)
+                if else_block:
+                    self.block(else_block)
+            elif tag is _T_WHILE:
+                self.expr(stmt[1])
+                self.block(stmt[2])
+            else:  # for over range(), the only other statement translated
+                for arg in stmt[2][2]:
+                    if self.expr(arg) is not int:
+                        raise _NotNumeric()
+                self.bind(stmt[1], int)
+                self.block(stmt[3])
+
+    def bind(self, name, kind):
+        if self.names.setdefault(name, kind) is not kind:
+            raise _NotNumeric()
+
+    def expr(self, node):
+        tag = node[0]
+        if tag is _T_NUMBER:
+            return type(node[1])
+        if tag is _T_IDENTIFIER:
+            return self.names[node[1]]
+        if tag is _T_NOT:
+            self.expr(node[1])
+            return bool
+        if tag is _T_CALL:  # abs()
+            if len(node[2]) != 1:
+                raise _NotNumeric()
+            kind = self.expr(node[2][0])
+            if kind is bool:
+                raise _NotNumeric()
+            if kind is int:
+                self.checked.add(id(node))
+            return kind
+        left = self.expr(node[1])
+        right = self.expr(node[2])
+        if tag is _T_AND or tag is _T_OR:
+            if left is not right:
+                raise _NotNumeric()
+            return left
+        if left is bool or right is bool:
+            if tag in _JIT_COMPARISONS and left is right:
+                return bool
+            raise _NotNumeric()
+        if tag in _JIT_COMPARISONS:
+            return bool
+        if tag is _T_DIVIDE:
+            return float
+        if tag in _JIT_ARITHMETIC:
+            if left is int and right is int:
+                if tag in _JIT_CHECKED:
+                    self.checked.add(id(node))
+                return int
+            return float
+        raise _NotNumeric()
+
+
+def _numeric_function(params, body):
+    """
+    Return a dispatcher running a numeric function compiled, or None if its
+    body cannot be translated. The dispatcher takes the call's evaluated
+    argument list and returns _NOT_JITTED for calls it does not take:
+    missing or extra arguments, non-numbers, argument types under which a
+    name would change type, a body Numba fails to type, or an integer
+    result that leaves the int64 range. Each tuple of argument types gets
+    its own translation, compiled on the first call it takes.
+    """
+    translator = _NumericSource()
+    try:
+        translator.function(params, body)
+    except _NotNumeric:
+        return None
+    reached = translator.reached
+    nparams = len(params)
+    # Compiled function, or False if the body does not compile, by tuple of
+    # argument types
+    compiled = {}
+    numba_error = None
+
+    def dispatch(args):
+        nonlocal numba_error
+        if len(args) != nparams:
+            return _NOT_JITTED
+        for arg in args:
+            if type(arg) is not float and not (
+                type(arg) is int and _INT64_MIN <= arg <= _INT64_MAX
+            ):
+                return _NOT_JITTED
+        arg_types = tuple(map(type, args))
+        function = compiled.get(arg_types)
+        if function is None:
+            types = _NumericTypes(params, arg_types, reached)
+            function = False
+            if types.check(body):
+                from numba import njit
+                from numba.core.errors import NumbaError
+
+                source = _NumericSource(types.checked).function(params, body)
+                namespace = _jit_namespace()
+                exec(source, namespace)
+                function = njit(namespace["function"])
+                numba_error = NumbaError
+            compiled[arg_types] = function
+        if function is False:
+            return _NOT_JITTED
+        try:
+            return function(*args)
+        except OverflowError:
+            return _NOT_JITTED
+        except numba_error:
+            compiled[arg_types] = False
+            return _NOT_JITTED
+
+    return dispatch
 
 
 # --------------------
-# RETURN EXCEPTION CLASS
+# BUILT-IN FUNCTIONS
 # --------------------
-class ReturnException(Exception):
-    def __init__(self, value):
-        self.value = value
+def _append(l, v):
+    # Mutate in place and hand the list back, so calls can be chained
+    l.append(v)
+    return l
+
+
+def _dict_set(d, k, v):
+    d[k] = v
+    return d
+
+
+# Digit translation tables for superscript()/subscript()
+_SUPERSCRIPT_DIGITS = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
+_SUBSCRIPT_DIGITS = str.maketrans("0123456789", "₀₁₂₃₄₅₆₇₈₉")
+
+
+# Escape codes by name for the colorama_* built-ins
+_FORE_CODES = {name: getattr(Fore, name) for name in dir(Fore) if name.isupper()}
+_BACK_CODES = {name: getattr(Back, name) for name in dir(Back) if name.isupper()}
+_STYLE_CODES = {name: getattr(Style, name) for name in dir(Style) if name.isupper()}
+
+
+# Built-ins that do not depend on interpreter state, built once at import;
+# each Interpreter copies this and adds its instance-bound entries
+_STATIC_BUILTINS = {
+    "len": len,
+    "str": str,
+    "int": int,
+    "type": lambda x: type(x).__name__,
+    "input": input,
+    "range": range,
+    "list_of_range": lambda *args: list(range(*args)),
+    "sum": sum,
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "sorted": sorted,
+    "reverse": lambda x: list(reversed(x)),
+    "append": _append,
+    "pop": methodcaller("pop"),
+    "http_status": attrgetter("status_code"),
+    "http_json": methodcaller("json"),
+    "http_text": attrgetter("text"),
+    "http_headers": attrgetter("headers"),
+    "http_url": attrgetter("url"),
+    "http_ok": attrgetter("ok"),
+    "http_raise_for_status": methodcaller("raise_for_status"),
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "sqrt": math.sqrt,
+    "log": math.log,
+    "exp": math.exp,
+    "pow": math.pow,
+    "math_pi": lambda: math.pi,
+    "math_e": lambda: math.e,
+    "read": methodcaller("read"),
+    "write": lambda f, data: f.write(data),
+    "close": methodcaller("close"),
+    # Dictionary support
+    "dict": dict,
+    "dict_get": lambda d, k, default=None: d.get(k, default),
+    "dict_set": _dict_set,
+    "dict_keys": lambda d: list(d.keys()),
+    "dict_values": lambda d: list(d.values()),
+    # Slicing
+    "slice": lambda x, start, end=None: x[start:end],
+    # Random and time utilities
+    "random": random.random,
+    "random_choice": random.choice,
+    "randint": random.randint,
+    "sleep": time.sleep,
+    "time": time.time,
+    # Date/time
+    "now": lambda: datetime.now().isoformat(),
+    "strftime": lambda fmt: datetime.now().strftime(fmt),
+    # Command-line arguments
+    "argv": lambda: sys.argv[1:],
+    # Help/docstring
+    "help": lambda x=None: (str(x.__doc__) if hasattr(x, "__doc__") else "No doc."),
+    # Set/tuple
+    "set": lambda *args: set(args),
+    "tuple": lambda *args: tuple(args),
+    "exit": lambda code=0: sys.exit(code),
+    "Error": Error,
+    "square": _square,
+    "mod": lambda x, y: x % y,
+    "is_prime": _is_prime,
+    "join": lambda iterable, sep="": sep.join(map(str, iterable)),
+    "split": lambda s, sep=None: s.split(sep),
+    "strip": methodcaller("strip"),
+    "startswith": lambda s, prefix: s.startswith(prefix),
+    "endswith": lambda s, suffix: s.endswith(suffix),
+    "find": lambda s, sub: s.find(sub),
+    "replace": lambda s, old, new: s.replace(old, new),
+    "upper": methodcaller("upper"),
+    "lower": methodcaller("lower"),
+    "capitalize": methodcaller("capitalize"),
+    "title": methodcaller("title"),
+    "isalpha": methodcaller("isalpha"),
+    "isdigit": methodcaller("isdigit"),
+    "isalnum": methodcaller("isalnum"),
+    "isspace": methodcaller("isspace"),
+    "isupper": methodcaller("isupper"),
+    "islower": methodcaller("islower"),
+    "isnumeric": methodcaller("isnumeric"),
+    "superscript": lambda x: str(x).translate(_SUPERSCRIPT_DIGITS),
+    "subscript": lambda x: str(x).translate(_SUBSCRIPT_DIGITS),
+    "format": lambda s, *args, **kwargs: s.format(*args, **kwargs),
+    "fstring": lambda s, **kwargs: s.format(**kwargs),
+    "time_now": lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    "time_sleep": time.sleep,
+    "time_timestamp": lambda: int(time.time()),
+    "time_utcnow": lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    # Tkinter GUI
+    "tk_root": lambda: _tk().Tk(),
+    "tk_label": lambda root, text: _tk().Label(root, text=text),
+    "tk_button": lambda root, text, command=None: _tk().Button(
+        root, text=text, command=command
+    ),
+    "tk_messagebox": lambda title, message: _tk().messagebox.showinfo(title, message),
+    "tk_mainloop": methodcaller("mainloop"),
+    "tk_set_title": lambda root, title: root.title(title),
+    # Colorama styling
+    "colorama_fore": lambda color: _FORE_CODES.get(color.upper(), Fore.RESET),
+    "colorama_back": lambda color: _BACK_CODES.get(color.upper(), Back.RESET),
+    "colorama_style": lambda style: _STYLE_CODES.get(style.upper(), Style.RESET_ALL),
+}
+
+# Argument names in Python's TypeError messages, for built-in call errors
+_MISSING_ARG_RE = re.compile(
+    r"missing (?:1 required positional argument: |a required argument: )'([^']+)'"
+)
+_UNEXPECTED_KWARG_RE = re.compile(r"got an unexpected keyword argument '([^']+)'")
+
+
+def _read_source(path):
+    # Read a .vlang file in one binary read and decode it once, skipping
+    # text mode's incremental decoder. The encoding (cp1252 on most Windows
+    # systems) and the newline handling are the ones text mode would use.
+    with open(path, "rb") as f:
+        source = f.read().decode(locale.getpreferredencoding(False))
+    if "\r" in source:
+        source = source.replace("\r\n", "\n").replace("\r", "\n")
+    return source
 
 
 # --------------------
 # INTERPRETER CLASS
 # --------------------
 class Interpreter:
+    # Compiled modules by absolute path (with the file's mtime and size when
+    # compiled), shared by every interpreter
+    _module_cache = {}
+
     def __init__(self, filename=None):
         self.filename = filename
         self.env = {}
         self.functions = {}
-        self.builtins = {
-            "len": lambda x: len(x),
-            "str": lambda x: str(x),
-            "int": lambda x: int(x),
-            "type": lambda x: type(x).__name__,
-            "input": lambda prompt="": input(prompt),
-            "range": lambda *args: list(range(*args)),
-            "sum": lambda x: sum(x),
-            "min": lambda x: min(x),
-            "max": lambda x: max(x),
-            "abs": lambda x: abs(x),
-            "sorted": lambda x: sorted(x),
-            "reverse": lambda x: list(reversed(x)),
-            "append": lambda l, v: l.append(v) or l,
-            "pop": lambda l: l.pop(),
-            "http_get": lambda url: requests.get(url).text,
-            "http_post": lambda url, data: requests.post(url, data=data).text,
-            "http_put": lambda url, data: requests.put(url, data=data).text,
-            "http_delete": lambda url: requests.delete(url).text,
-            "http_head": lambda url: requests.head(url).headers,
-            "http_options": lambda url: requests.options(url).headers,
-            "http_patch": lambda url, data: requests.patch(url, data=data).text,
-            "http_status": lambda response: response.status_code,
-            "http_json": lambda response: response.json(),
-            "http_text": lambda response: response.text,
-            "http_headers": lambda response: response.headers,
-            "http_url": lambda response: response.url,
-            "http_ok": lambda response: response.ok,
-            "http_raise_for_status": lambda response: response.raise_for_status(),
-            "sin": lambda x: math.sin(x),
-            "cos": lambda x: math.cos(x),
-            "tan": lambda x: math.tan(x),
-            "sqrt": lambda x: math.sqrt(x),
-            "log": lambda x: math.log(x),
-            "exp": lambda x: math.exp(x),
-            "pow": lambda x, y: math.pow(x, y),
-            "math_pi": lambda: math.pi,
-            "math_e": lambda: math.e,
-            "open": self._bif_open,
-            "read": lambda f: f.read(),
-            "write": lambda f, data: f.write(data),
-            "close": lambda f: f.close(),
-            # Dictionary support
-            "dict": lambda: {},
-            "dict_get": lambda d, k, default=None: d.get(k, default),
-            "dict_set": lambda d, k, v: d.__setitem__(k, v) or d,
-            "dict_keys": lambda d: list(d.keys()),
-            "dict_values": lambda d: list(d.values()),
-            # Slicing
-            "slice": lambda x, start, end=None: x[start:end],
-            # Random and time utilities
-            "random": lambda: random.random(),
-            "random_choice": lambda x: random.choice(x),
-            "randint": lambda a, b: random.randint(a, b),
-            "sleep": lambda s: time.sleep(s),
-            "time": lambda: time.time(),
-            # Date/time
-            "now": lambda: datetime.now().isoformat(),
-            "strftime": lambda fmt: datetime.now().strftime(fmt),
-            # Command-line arguments
-            "argv": lambda: sys.argv[1:],
-            # Help/docstring
-            "help": lambda x=None: (
-                str(x.__doc__) if hasattr(x, "__doc__") else "No doc."
-            ),
-            # Set/tuple
-            "set": lambda *args: set(args),
-            "tuple": lambda *args: tuple(args),
-            "run": self._bif_run,
-            "run_async": self._bif_run_async,
-            "async": self._bif_async,
-            "await": self._bif_await,
-            "exit": lambda code=0: sys.exit(code),
-            "Error": Error,
-            "square": lambda x: float(x * x),
-            "mod": lambda x, y: x % y,
-            "is_prime": lambda n: n > 1
-            and all(n % i != 0 for i in range(2, int(n**0.5) + 1)),
-            "join": lambda iterable, sep="": sep.join(map(str, iterable)),
-            "split": lambda s, sep=None: s.split(sep),
-            "strip": lambda s: s.strip(),
-            "startswith": lambda s, prefix: s.startswith(prefix),
-            "endswith": lambda s, suffix: s.endswith(suffix),
-            "find": lambda s, sub: s.find(sub),
-            "replace": lambda s, old, new: s.replace(old, new),
-            "upper": lambda s: s.upper(),
-            "lower": lambda s: s.lower(),
-            "capitalize": lambda s: s.capitalize(),
-            "title": lambda s: s.title(),
-            "isalpha": lambda s: s.isalpha(),
-            "isdigit": lambda s: s.isdigit(),
-            "isalnum": lambda s: s.isalnum(),
-            "isspace": lambda s: s.isspace(),
-            "isupper": lambda s: s.isupper(),
-            "islower": lambda s: s.islower(),
-            "isnumeric": lambda s: s.isnumeric(),
-            "superscript": lambda x: (
-                str(x)
-                .replace("0", "⁰")
-                .replace("1", "¹")
-                .replace("2", "²")
-                .replace("3", "³")
-                .replace("4", "⁴")
-                .replace("5", "⁵")
-                .replace("6", "⁶")
-                .replace("7", "⁷")
-                .replace("8", "⁸")
-                .replace("9", "⁹")
-            ),
-            "subscript": lambda x: (
-                str(x)
-                .replace("0", "₀")
-                .replace("1", "₁")
-                .replace("2", "₂")
-                .replace("3", "₃")
-                .replace("4", "₄")
-                .replace("5", "₅")
-                .replace("6", "₆")
-                .replace("7", "₇")
-                .replace("8", "₈")
-                .replace("9", "₉")
-            ),
-            "format": lambda s, *args, **kwargs: s.format(*args, **kwargs),
-            "fstring": lambda s, **kwargs: s.format(**kwargs),
-            "time_now": lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "time_sleep": lambda seconds: time.sleep(seconds),
-            "time_timestamp": lambda: int(time.time()),
-            "time_utcnow": lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            # Tkinter GUI
-            "tk_root": lambda: tk.Tk(),
-            "tk_label": lambda root, text: tk.Label(root, text=text),
-            "tk_button": lambda root, text, command=None: tk.Button(
-                root, text=text, command=command
-            ),
-            "tk_messagebox": lambda title, message: messagebox.showinfo(title, message),
-            "tk_mainloop": lambda root: root.mainloop(),
-            "tk_set_title": lambda root, title: root.title(title),
-            "tk_mainloop": lambda root: root.mainloop(),
-            # Colorama styling
-            "colorama_fore": lambda color: getattr(Fore, color.upper(), Fore.RESET),
-            "colorama_back": lambda color: getattr(Back, color.upper(), Back.RESET),
-            "colorama_style": lambda style: getattr(
-                Style, style.upper(), Style.RESET_ALL
-            ),
-        }
+        # One pooled HTTP session per interpreter so repeated requests reuse
+        # connections; opened by the first http_* call, since interpreters
+        # for run/import rarely need one
+        self._http = None
+        self.builtins = dict(_STATIC_BUILTINS)
+        session = self._session
+        # Built-ins bound to this interpreter instance
+        self.builtins.update(
+            {
+                "http_get": lambda url: session().get(url).text,
+                "http_post": lambda url, data: session().post(url, data=data).text,
+                "http_put": lambda url, data: session().put(url, data=data).text,
+                "http_delete": lambda url: session().delete(url).text,
+                "http_head": lambda url: session().head(url).headers,
+                "http_options": lambda url: session().options(url).headers,
+                "http_patch": lambda url, data: session().patch(url, data=data).text,
+                "open": self._bif_open,
+                "run": self._bif_run,
+                "run_async": self._bif_run_async,
+                "async": self._bif_async,
+                "await": self._bif_await,
+            }
+        )
+        self._compiler = Compiler(self.builtins)
         self._async_tasks = []
+        self._loop = None
+        # Worker threads for async(), started on its first call
+        self._executor = None
+
+    def _session(self):
+        if self._http is None:
+            self._http = requests.Session()
+        return self._http
+
+    def close(self):
+        # Release pooled HTTP connections and async() worker threads
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def __del__(self):
+        self.close()
 
     def _bif_open(self, filename, mode="r"):
         return open(filename, mode)
 
     async def _bif_run(self, filename):
         # Blocking run of another .vlang file (from within async context)
-        with open(filename, "r") as f:
-            code = f.read()
-        tokens = tokenize(code)
-        parser = Parser(filename, tokens, code=code)
-        ast = parser.parse()
-        interpreter = Interpreter()
-        interpreter.env = self.env.copy()
-        interpreter.functions = self.functions.copy()
-        await interpreter.run(ast)
-        self.env.update(interpreter.env)
-        self.functions.update(interpreter.functions)
+        await self.run_file(filename, self.env)
 
     async def _bif_run_async(self, filename):
         # Non-blocking run of another .vlang file (returns a task)
-        async def run_file():
-            with open(filename, "r") as f:
-                code = f.read()
-            tokens = tokenize(code)
-            parser = Parser(filename, tokens, code=code)
-            ast = parser.parse()
-            interpreter = Interpreter()
-            interpreter.env = self.env.copy()
-            interpreter.functions = self.functions.copy()
-            await interpreter.run(ast)
-
-        return asyncio.create_task(run_file())
+        return asyncio.create_task(self.run_file(filename, self.env, is_async=True))
+
+    def _get_loop(self):
+        # The event loop async()/await() work on, looked up once
+        if self._loop is None:
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._loop = asyncio.new_event_loop()
+        return self._loop
 
     def _bif_async(self, func, *args):
         # Schedule a function to run asynchronously
-        loop = asyncio.get_event_loop()
-        task = loop.run_in_executor(None, func, *args)
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+        task = self._get_loop().run_in_executor(self._executor, func, *args)
         self._async_tasks.append(task)
         return task
 
     def _bif_await(self, task):
-        # Await a previously started async task
-        loop = asyncio.get_event_loop()
+        # Await a previously started async task. Inside the running loop the
+        # task itself is handed back for an await expression to wait on.
+        loop = self._get_loop()
+        if loop.is_running():
+            return task
         return loop.run_until_complete(task)
 
     async def execute_block(self, block, env):
-        # Use local variable for speed
-        execute = self.execute
-        result = None
-        for stmt in block:
-            result = await execute(stmt, env)
-        return result
-
-    async def execute(self, node, env=None):
-        # Use local variables for hot lookups
-        builtins = self.builtins
-        functions = self.functions
-        if node[0] == "assign":
-            _, name, expr = node
-            value = await self.execute(expr, env)
-            env[name] = value
-            return value
-        elif node[0] == "function_decl":
-            _, name, params, body = node
-
-            async def func(*args):
-                local_env = env.copy()
-                for i, param in enumerate(params):
-                    local_env[param] = args[i] if i < len(args) else None
-                try:
-                    return await self.execute_block(body, local_env)
-                except ReturnException as ret:
-                    return ret.value
-
-            env[name] = func
-            self.functions[name] = ("sync", params, body)
-        elif node[0] == "async_function_decl":
-            _, name, params, body = node
-
-            async def async_func(*args):
-                local_env = env.copy()
-                for i, param in enumerate(params):
-                    local_env[param] = args[i] if i < len(args) else None
-                try:
-                    return await self.execute_block(body, local_env)
-                except ReturnException as ret:
-                    return ret.value
-
-            env[name] = async_func
-            self.functions[name] = ("async", params, body)
-        elif node[0] == "print":
-            values = [await self.execute(arg, env) for arg in node[1]]
-            print(*values)
-        elif node[0] == "expr_stmt":
-            return await self.execute(node[1], env)
-        elif node[0] == "+":
-            return await self.execute(node[1], env) + await self.execute(node[2], env)
-        elif node[0] == "-":
-            return await self.execute(node[1], env) - await self.execute(node[2], env)
-        elif node[0] == "*":
-            return await self.execute(node[1], env) * await self.execute(node[2], env)
-        elif node[0] == "/":
-            return await self.execute(node[1], env) / await self.execute(node[2], env)
-        elif node[0] == "%":
-            return await self.execute(node[1], env) % await self.execute(node[2], env)
-        elif node[0] == "number":
-            return node[1]
-        elif node[0] == "identifier":
-            val = env.get(node[1], builtins.get(node[1], None))
-            if val is not None:
-                return val
-            raise VirtoRuntimeError(
-                f"Undefined variable: {node[1]}", filename=self.filename
+        # Compile a parsed block and run it in env
+        return await self._vm(self._compiler.compile(block), env)
+
+    def _closure(self, func, env):
+        # Function value bound in env, for built-ins that take callbacks
+        async def closure(*args):
+            return await self._vm(func, env.copy(), args)
+
+        return closure
+
+    def _find_module(self, module_name, is_path):
+        # Resolve an import to the first candidate file that exists. The
+        # search runs on every import, so a module added at a location that
+        # comes earlier in the search takes over from the one found before.
+        cwd = os.getcwd()
+        vlang_path = os.environ.get("VLANG_PATH", cwd)
+        candidates = self._import_candidates(module_name, is_path, vlang_path, cwd)
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return candidate
+        # Support quoted string import: import "C:/test"
+        if is_path:
+            raise RuntimeError(f"Module path '{candidates[0]}' not found.")
+        raise RuntimeError(
+            f"Module '{module_name}' not found. Searched: {list(candidates)}"
+        )
+
+    def _import_candidates(self, module_name, is_path, vlang_path, cwd):
+        # Files an import may name, in search order
+        if is_path:
+            path = module_name
+            if not path.endswith(".vlang"):
+                path += ".vlang"
+            return (path,)
+        parts = module_name.split(".")
+        if len(parts) > 1:
+            # import foo.bar -> <VLANG_PATH>/packages/foo/bar.vlang
+            return (
+                os.path.join(vlang_path, "packages", *parts[:-1], parts[-1] + ".vlang"),
             )
-        elif node[0] == "string":
-            return node[1]
-        elif node[0] == "if":
-            _, cond, then_block, elif_blocks, else_block = node
-            if await self.execute(cond, env):
-                return await self.execute_block(then_block, env)
-            for elif_cond, elif_body in elif_blocks:
-                if await self.execute(elif_cond, env):
-                    return await self.execute_block(elif_body, env)
-            if else_block:
-                return await self.execute_block(else_block, env)
-        elif node[0] == "while":
-            _, cond, body = node
-            while await self.execute(cond, env):
-                await self.execute_block(body, env)
-        elif node[0] == "for":
-            _, var, iterable, body = node
-            it = await self.execute(iterable, env)
-            for val in it:
-                env[var] = val
-                await self.execute_block(body, env)
-        elif node[0] == "list":
-            return [await self.execute(e, env) for e in node[1]]
-        elif node[0] == "call":
-            func = node[1]
-            args = node[2]
-            if func in builtins:
-                bfunc = builtins[func]
-                try:
-                    result = bfunc(*[await self.execute(arg, env) for arg in args])
-                    return result
-                except (TypeError, ValueError) as e:
-                    msg = str(e)
-                    # Custom formatting for missing argument errors
-                    if (
-                        "missing 1 required positional argument" in msg
-                        or "missing a required argument" in msg
-                    ):
-                        # Try to extract argument name
-                        import re as _re
-
-                        m = _re.search(
-                            r"missing (?:1 required positional argument: |a required argument: )'([^']+)'",
-                            msg,
-                        )
-                        argname = m.group(1) if m else None
-                        if argname:
-                            msg = f"{func}() missing required argument '{argname}'"
-                        else:
-                            msg = f"{func}() missing required argument"
-                    elif "got an unexpected keyword argument" in msg:
-                        m = _re.search(
-                            r"got an unexpected keyword argument '([^']+)'", msg
-                        )
-                        argname = m.group(1) if m else None
-                        if argname:
-                            msg = f"{func}() got an unexpected keyword argument '{argname}'"
-                        else:
-                            msg = f"{func}() got an unexpected keyword argument"
-                    elif "takes" in msg and "positional arguments" in msg:
-                        # e.g. 'foo() takes 2 positional arguments but 3 were given'
-                        msg = f"{func}() {msg}"
-                    raise VirtoArgumentError(
-                        f"Error in built-in function '{func}': {msg}",
-                        filename=self.filename,
-                    )
-                except Exception as e:
-                    raise VirtoRuntimeError(
-                        f"Error in built-in function '{func}': {e}",
-                        filename=self.filename,
-                    )
-            elif func in functions:
-                ftype, params, body = functions[func]
-                local_env = env.copy()
-                for i, param in enumerate(params):
-                    local_env[param] = (
-                        await self.execute(args[i], env) if i < len(args) else None
-                    )
-                if ftype == "sync":
-                    try:
-                        for stmt in body:
-                            await self.execute(stmt, local_env)
-                    except ReturnException as re:
-                        return re.value
-                elif ftype == "async":
-
-                    async def async_func():
-                        try:
-                            for stmt in body:
-                                await self.execute(stmt, local_env)
-                        except ReturnException as re:
-                            return re.value
-
-                    return await async_func()
-                else:
-                    raise VirtoRuntimeError(
-                        f"Unknown function type: {ftype}", filename=self.filename
-                    )
+        # Try test.vlang in the same directory as the current script
+        if len(sys.argv) > 1 and os.path.isfile(sys.argv[1]):
+            base_dir = os.path.dirname(os.path.abspath(sys.argv[1]))
+        else:
+            base_dir = cwd
+        return (
+            # <VLANG_PATH>/packages/test/__init__.vlang
+            os.path.join(vlang_path, "packages", parts[0], "__init__.vlang"),
+            # <VLANG_PATH>/packages/test.vlang
+            os.path.join(vlang_path, "packages", parts[0] + ".vlang"),
+            os.path.join(base_dir, parts[0] + ".vlang"),
+        )
+
+    def _load_module(self, module_name, is_path):
+        return self._load_code(self._find_module(module_name, is_path))
+
+    def _load_code(self, filename):
+        # Compile a .vlang file, reusing the result while it is unchanged on
+        # disk. Nanosecond mtime plus size catches rewrites within one clock
+        # tick, and keeping one entry per path lets an edit replace the old one
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = Interpreter._module_cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        source = _read_source(filename)
+        tokens = tokenize(source)
+        parser = Parser(filename, tokens, code=source)
+        ast = parser.parse()
+        code = self._compiler.compile(ast, filename)
+        Interpreter._module_cache[path] = (stamp, code)
+        return code
+
+    def _builtin_error(self, func, e):
+        # Report an exception raised in (or while calling) built-in func
+        if not isinstance(e, (TypeError, ValueError)):
+            return VirtoRuntimeError(
+                f"Error in built-in function '{func}': {e}", filename=self.filename
+            )
+        msg = str(e)
+        # Custom formatting for missing argument errors
+        if (
+            "missing 1 required positional argument" in msg
+            or "missing a required argument" in msg
+        ):
+            # Try to extract argument name
+            m = _MISSING_ARG_RE.search(msg)
+            argname = m.group(1) if m else None
+            if argname:
+                msg = f"{func}() missing required argument '{argname}'"
             else:
-                raise VirtoRuntimeError(
-                    f"Undefined function: {func}", filename=self.filename
-                )
-        elif node[0] == "import":
-            module_name = node[1]
-            vlang_path = os.environ.get("VLANG_PATH", os.getcwd())
-            # Support quoted string import: import "C:/test"
-            if (module_name.startswith('"') and module_name.endswith('"')) or (
-                module_name.startswith("'") and module_name.endswith("'")
-            ):
-                # Remove quotes
-                path = module_name[1:-1]
-                if not path.endswith(".vlang"):
-                    path += ".vlang"
-                filename = path
-                if not os.path.isfile(filename):
-                    raise RuntimeError(f"Module path '{filename}' not found.")
+                msg = f"{func}() missing required argument"
+        elif "got an unexpected keyword argument" in msg:
+            m = _UNEXPECTED_KWARG_RE.search(msg)
+            argname = m.group(1) if m else None
+            if argname:
+                msg = f"{func}() got an unexpected keyword argument '{argname}'"
             else:
-                parts = module_name.split(".")
-                search_paths = []
-                found = False
-                if len(parts) == 1:
-                    # Try <VLANG_PATH>/packages/test/__init__.vlang
-                    dir_init = os.path.join(
-                        vlang_path, "packages", parts[0], "__init__.vlang"
-                    )
-                    search_paths.append(dir_init)
-                    # Try <VLANG_PATH>/packages/test.vlang
-                    file_mod = os.path.join(vlang_path, "packages", parts[0] + ".vlang")
-                    search_paths.append(file_mod)
-                    # Try test.vlang in the same directory as the current script
-                    if len(sys.argv) > 1 and os.path.isfile(sys.argv[1]):
-                        base_dir = os.path.dirname(os.path.abspath(sys.argv[1]))
-                    else:
-                        base_dir = os.getcwd()
-                    local_file = os.path.join(base_dir, parts[0] + ".vlang")
-                    search_paths.append(local_file)
-                    for candidate in search_paths:
-                        if os.path.isfile(candidate):
-                            filename = candidate
-                            found = True
-                            break
-                else:
-                    # import foo.bar -> <VLANG_PATH>/packages/foo/bar.vlang
-                    filename = os.path.join(
-                        vlang_path, "packages", *parts[:-1], parts[-1] + ".vlang"
-                    )
-                    search_paths.append(filename)
-                    if os.path.isfile(filename):
-                        found = True
-                if not found:
-                    raise RuntimeError(
-                        f"Module '{module_name}' not found. Searched: {search_paths}"
-                    )
-            with open(filename, "r") as f:
-                code = f.read()
-            tokens = tokenize(code)
-            parser = Parser(tokens, code=code, filename=filename)
-            ast = parser.parse()
-            await self.execute_block(ast, env)
-        elif node[0] == "with":
-            resource = await self.execute(node[1], env)
-            varname = node[2]
-            body = node[3]
-            old_env = env.copy()
-            env[varname] = resource
-            try:
-                result = await self.execute_block(body, env)
-            finally:
-                if hasattr(resource, "close"):
-                    resource.close()
-            env.update(old_env)
-            return result
-        elif node[0] == "return":
-            value = await self.execute(node[1], env)
-            raise ReturnException(value)
-        elif node[0] == "await_stmt":
-            task = await self.execute(node[1], env)
-            if hasattr(task, "__await__"):
-                return await task
-            return task
-        elif node[0] == "run_stmt":
-            _, filename_expr = node
-            filename = await self.execute(filename_expr, env)
-            await self.run_file(filename, env, is_async=False)
-        elif node[0] == "run_async_stmt":
-            _, filename_expr = node
-            filename = await self.execute(filename_expr, env)
-            return asyncio.create_task(self.run_file(filename, env, is_async=True))
-        elif node[0] == "await_expr":
-            _, expr = node
-            task = await self.execute(expr, env)
-            if hasattr(task, "__await__"):
-                return await task
-            return task
-        elif node[0] == "or":
-            return await self.execute(node[1], env) or await self.execute(node[2], env)
-        elif node[0] == "and":
-            return await self.execute(node[1], env) and await self.execute(node[2], env)
-        elif node[0] == "==":
-            return await self.execute(node[1], env) == await self.execute(node[2], env)
-        elif node[0] == "!=":
-            return await self.execute(node[1], env) != await self.execute(node[2], env)
-        elif node[0] == "<":
-            return await self.execute(node[1], env) < await self.execute(node[2], env)
-        elif node[0] == "<=":
-            return await self.execute(node[1], env) <= await self.execute(node[2], env)
-        elif node[0] == ">":
-            return await self.execute(node[1], env) > await self.execute(node[2], env)
-        elif node[0] == ">=":
-            return await self.execute(node[1], env) >= await self.execute(node[2], env)
-        elif node[0] == "not":
-            return not await self.execute(node[1], env)
-        elif node[0] == "is":
-            return await self.execute(node[1], env) is await self.execute(node[2], env)
-        elif node[0] == "is not":
-            return await self.execute(node[1], env) is not await self.execute(
-                node[2], env
-            )
-        elif node[0] == "in":
-            return await self.execute(node[1], env) in await self.execute(node[2], env)
-        elif node[0] == "not in":
-            return await self.execute(node[1], env) not in await self.execute(
-                node[2], env
-            )
-        elif node[0] == "try":
-            try_block = node[1]
-            except_blocks = node[2]
-            finally_block = node[3]
+                msg = f"{func}() got an unexpected keyword argument"
+        elif "takes" in msg and "positional arguments" in msg:
+            # e.g. 'foo() takes 2 positional arguments but 3 were given'
+            msg = f"{func}() {msg}"
+        return VirtoArgumentError(
+            f"Error in built-in function '{func}': {msg}", filename=self.filename
+        )
+
+    def _unwind(self, frame, error):
+        # Apply frame's exception table to error raised by the instruction
+        # before frame.pc. Returns the handler address (with the exception
+        # pushed) and the error as it now stands, or None if nothing in this
+        # frame catches it.
+        ip = frame.pc - 2
+        for start, end, kind, target, arg in frame.code.handlers:
+            if start <= ip < end:
+                if kind == _H_BUILTIN:
+                    if isinstance(error, Exception):
+                        error = self._builtin_error(arg, error)
+                    continue
+                if kind == _H_RESTORE:
+                    frame.env.clear()
+                    frame.env.update(frame.temps[arg])
+                    continue
+                if kind == _H_RESTORE_FAST:
+                    frame.fast[:] = frame.temps[arg]
+                    continue
+                if kind == _H_EXCEPT and not isinstance(error, Exception):
+                    continue
+                del frame.stack[frame.temps[arg] :]
+                frame.stack.append(error)
+                return target, error
+        return None, error
+
+    def _outer_name(self, frame, name):
+        # Value of a name frame does not hold in a bound fast slot: the
+        # bound fast locals of the callers sharing its env come first,
+        # innermost first, then env and the builtins
+        parent = frame.parent
+        while parent is not None:
+            slot = parent.code.slots.get(name)
+            if slot is not None and parent.fast[slot] is not _UNBOUND:
+                return parent.fast[slot]
+            parent = parent.parent
+        env = frame.env
+        val = env.get(name)
+        if val is None and name not in env:
+            val = self.builtins.get(name)
+        return val
+
+    def _frame_names(self, frame):
+        # A copy of the names frame sees, for a callee that stores into env
+        names = frame.env.copy()
+        chain = []
+        while frame is not None and frame.fast is not None:
+            chain.append(frame)
+            frame = frame.parent
+        for outer in reversed(chain):
+            for name, val in zip(outer.code.varnames, outer.fast):
+                if val is not _UNBOUND:
+                    names[name] = val
+        return names
+
+    async def _vm(self, func, env, args=()):
+        # Run func in env to completion. The VM itself is synchronous; this
+        # only awaits what it hands back at await and run instructions, then
+        # resumes it with the result (or the exception) on the same frames.
+        frames = [_Frame(func, env, args)]
+        done, value = self._execute(frames)
+        while not done:
             try:
-                result = await self.execute_block(try_block, env)
-            except Exception as exc:
-                handled = False
-                for exc_type, exc_var, exc_block in except_blocks:
-                    if exc_type is None or (type(exc).__name__ == exc_type):
-                        local_env = env.copy()
-                        if exc_var:
-                            local_env[exc_var] = exc
-                        await self.execute_block(exc_block, local_env)
-                        handled = True
+                value = await value
+            except BaseException as error:
+                done, value = self._execute(frames, error)
+            else:
+                frames[-1].stack.append(value)
+                done, value = self._execute(frames)
+        return value
+
+    def _execute(self, frames, error=None):
+        # Run the frame stack until the outermost frame returns, giving
+        # (True, value), or an instruction needs to await, giving
+        # (False, awaitable). VirtoLang calls push frames instead of
+        # recursing; error is raised into the innermost frame on resume.
+        builtins = self.builtins
+        functions = self.functions
+        handlers = _OP_HANDLERS
+        unbound = _UNBOUND
+        limit = sys.getrecursionlimit()
+        while True:
+            frame = frames[-1]
+            if error is not None:
+                while True:
+                    target, error = self._unwind(frame, error)
+                    if target is not None:
                         break
-                if not handled:
-                    raise
-            finally:
-                if finally_block:
-                    await self.execute_block(finally_block, env)
-            return None
-        elif node[0] == "raise":
-            exc = await self.execute(node[1], env)
-            raise exc
-        elif node[0] == "try":
-            try_block = node[1]
-            except_blocks = node[2]
-            finally_block = node[3]
+                    frames.pop()
+                    if not frames:
+                        raise error
+                    frame = frames[-1]
+                frame.pc = target
+                error = None
+            code = frame.code.code
+            consts = frame.code.consts
+            names = frame.code.names
+            env = frame.env
+            fast = frame.fast
+            parent = frame.parent
+            stack = frame.stack
+            temps = frame.temps
+            pc = frame.pc
             try:
-                result = await self.execute_block(try_block, env)
-            except Exception as exc:
-                handled = False
-                for exc_type, exc_var, exc_block in except_blocks:
-                    if exc_type is None or (type(exc).__name__ == exc_type):
-                        local_env = env.copy()
-                        if exc_var:
-                            local_env[exc_var] = exc
-                        await self.execute_block(exc_block, local_env)
-                        handled = True
+                while True:
+                    op = code[pc]
+                    arg = code[pc + 1]
+                    pc += 2
+                    if op < _OP_FIRST_OPERATOR:
+                        if op == _OP_LOAD_FAST:
+                            val = fast[arg]
+                            if val is unbound or val is None:
+                                name = frame.code.varnames[arg]
+                                if val is unbound:
+                                    val = self._outer_name(frame, name)
+                                if val is None:
+                                    raise VirtoRuntimeError(
+                                        f"Undefined variable: {name}",
+                                        filename=self.filename,
+                                    )
+                            stack.append(val)
+                        elif op == _OP_LOAD_NAME:
+                            name = names[arg]
+                            if parent is None:
+                                # A subscript is cheaper than env.get() plus
+                                # a membership test, and misses are rare
+                                try:
+                                    val = env[name]
+                                except KeyError:
+                                    val = builtins.get(name)
+                            else:
+                                val = self._outer_name(frame, name)
+                            if val is None:
+                                raise VirtoRuntimeError(
+                                    f"Undefined variable: {name}",
+                                    filename=self.filename,
+                                )
+                            stack.append(val)
+                        elif op == _OP_CONST:
+                            stack.append(consts[arg])
+                        elif op == _OP_STORE_FAST:
+                            fast[arg] = stack.pop()
+                        elif op == _OP_STORE_NAME:
+                            env[names[arg]] = stack.pop()
+                        elif op == _OP_POP_JUMP_IF_FALSE:
+                            if not stack.pop():
+                                pc = arg
+                        elif op == _OP_POP_JUMP_IF_TRUE:
+                            if stack.pop():
+                                pc = arg
+                        elif op == _OP_JUMP:
+                            pc = arg
+                        elif op == _OP_FOR_ITER:
+                            val = next(stack[-1], _EXHAUSTED)
+                            if val is _EXHAUSTED:
+                                stack.pop()
+                                pc = arg
+                            # A for loop stores each item straight into its
+                            # variable; do that here and skip the dispatch
+                            elif code[pc] == _OP_STORE_FAST:
+                                fast[code[pc + 1]] = val
+                                pc += 2
+                            elif code[pc] == _OP_STORE_NAME:
+                                env[names[code[pc + 1]]] = val
+                                pc += 2
+                            else:
+                                stack.append(val)
+                        elif op == _OP_CALL_BUILTIN:
+                            func, argc = consts[arg]
+                            if argc:
+                                args = stack[-argc:]
+                                del stack[-argc:]
+                                stack.append(func(*args))
+                            else:
+                                stack.append(func())
+                        elif op == _OP_LOAD_FUNC:
+                            callee = functions.get(names[arg])
+                            if callee is None:
+                                raise VirtoRuntimeError(
+                                    f"Undefined function: {names[arg]}",
+                                    filename=self.filename,
+                                )
+                            stack.append(callee)
+                        elif op == _OP_CALL_FUNC:
+                            if arg:
+                                args = stack[-arg:]
+                                del stack[-arg:]
+                            else:
+                                args = ()
+                            callee = stack.pop()
+                            if callee.jit is not None:
+                                val = callee.jit(args)
+                                if val is not _NOT_JITTED:
+                                    stack.append(val)
+                                    continue
+                            if len(frames) >= limit:
+                                raise RecursionError("maximum recursion depth exceeded")
+                            # The callee sees the caller's names, including
+                            # its bound fast locals
+                            frame.pc = pc
+                            if callee.varnames:
+                                frames.append(
+                                    _Frame(
+                                        callee,
+                                        env,
+                                        args,
+                                        frame if fast is not None else None,
+                                    )
+                                )
+                            else:
+                                frames.append(
+                                    _Frame(callee, self._frame_names(frame), args)
+                                )
+                            break
+                        elif op == _OP_RETURN or op == _OP_RETURN_NONE:
+                            val = stack.pop() if op == _OP_RETURN else None
+                            frames.pop()
+                            if not frames:
+                                return True, val
+                            frames[-1].stack.append(val)
+                            break
+                        elif op == _OP_POP:
+                            stack.pop()
+                    elif op == _OP_ADD:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] + b
+                    elif op == _OP_SUB:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] - b
+                    elif op == _OP_LT:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] < b
+                    elif op == _OP_EQ:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] == b
+                    elif op == _OP_MUL:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] * b
+                    elif op == _OP_DIV:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] / b
+                    elif op == _OP_MOD:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] % b
+                    elif op == _OP_NE:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] != b
+                    elif op == _OP_LE:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] <= b
+                    elif op == _OP_GT:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] > b
+                    elif op == _OP_GE:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] >= b
+                    elif op == _OP_IS:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] is b
+                    elif op == _OP_IS_NOT:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] is not b
+                    elif op == _OP_IN:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] in b
+                    elif op == _OP_NOT_IN:
+                        b = stack.pop()
+                        stack[-1] = stack[-1] not in b
+                    elif op == _OP_NOT:
+                        stack[-1] = not stack[-1]
+                    elif op >= _OP_FIRST_HANDLED:
+                        handlers[op](self, frame, arg)
+                    elif op == _OP_JUMP_IF_FALSE_OR_POP:
+                        if stack[-1]:
+                            stack.pop()
+                        else:
+                            pc = arg
+                    elif op == _OP_JUMP_IF_TRUE_OR_POP:
+                        if stack[-1]:
+                            pc = arg
+                        else:
+                            stack.pop()
+                    elif op == _OP_EXC_DISPATCH:
+                        table = consts[arg]
+                        pc = table.get(type(stack[-1]).__name__, table[None])
+                    elif op == _OP_AWAIT:
+                        if hasattr(stack[-1], "__await__"):
+                            frame.pc = pc
+                            return False, stack.pop()
+                    elif op == _OP_IMPORT:
+                        # The module body runs as a frame sharing this env
+                        module = self._load_module(*consts[arg])
+                        if len(frames) >= limit:
+                            raise RecursionError("maximum recursion depth exceeded")
+                        frame.pc = pc
+                        frames.append(_Frame(module, env))
                         break
-                if not handled:
-                    raise
-            finally:
-                if finally_block:
-                    await self.execute_block(finally_block, env)
-            return None
-        else:
-            raise RuntimeError(f"Unknown AST node: {node}")
+                    elif op == _OP_RUN_FILE:
+                        path = stack.pop()
+                        if arg:
+                            stack.append(
+                                asyncio.create_task(
+                                    self.run_file(path, env, is_async=True)
+                                )
+                            )
+                        else:
+                            frame.pc = pc
+                            return False, self.run_file(path, env, is_async=False)
+                    else:
+                        raise RuntimeError(f"Unknown opcode: {op}")
+            except BaseException as exc:
+                frame.pc = pc
+                error = exc
 
     async def run(self, ast):
-        env = self.env.copy()
-        await self.execute_block(ast, env)
+        await self.run_bytecode(self._compiler.compile(ast))
+
+    async def run_bytecode(self, code):
+        await self._vm(code, self.env.copy())
 
     async def run_file(self, filename, env, is_async=False):
-        # Load and execute another .vlang file, sharing env and functions
-        with open(filename, "r") as f:
-            code = f.read()
-        tokens = tokenize(code)
-        parser = Parser(filename, tokens, code=code)
-        ast = parser.parse()
+        # Load and execute another .vlang file, sharing env and functions.
+        # The compiled file comes from the shared module cache, so this
+        # only tokenizes and parses it the first time.
+        code = self._load_code(filename)
         interpreter = Interpreter(filename)
         # Share environment and functions
         interpreter.env = env.copy()
         interpreter.functions = self.functions.copy()
-        if is_async:
-            # For run_async, just run and return (as a task in caller)
-            await interpreter.run(ast)
-        else:
-            # For run (sync), run and update caller's env and functions
-            await interpreter.run(ast)
+        # Share the pooled HTTP session too, keeping one the file opened;
+        # the file's interpreter must not close it when it is collected
+        interpreter._http = self._http
+        try:
+            await interpreter.run_bytecode(code)
+        finally:
+            if self._http is None:
+                self._http = interpreter._http
+            interpreter._http = None
+        if not is_async:
+            # For run (sync), update caller's env and functions
             env.update(interpreter.env)
             self.functions.update(interpreter.functions)
 
@@ -1314,19 +3057,24 @@ class VirtoRuntimeError(Exception):
         self.token = token
         self.filename = filename
         self.code = code
-        super().__init__(self.__str__())
+        # Formatted on first __str__: a VirtoLang except clause that drops
+        # the error never pays for the source line and the pointer
+        self._str_cache = None
+        super().__init__(message)
 
-    def __str__(self):
+    def _format(self):
         # Only access .line and .column if token is not a string
         if self.token and not isinstance(self.token, str):
             pointer = f"File \"{self.filename or '<input>'}\", line {self.token.line}, col {self.token.column}"
-            code_line = ""
-            if self.code:
-                lines = self.code.splitlines()
-                if 1 <= self.token.line <= len(lines):
-                    code_line = lines[self.token.line - 1]
-            return f"{Fore.RED}RuntimeError: {self.message}\n  {pointer}\n    {code_line}\n    {' '*(self.token.column-1)}^"
-        return f"{Fore.RED}RuntimeError: {self.message}"
+            code_line = _source_line(self.code, self.token.line) if self.code else ""
+            return f"{_ERROR_COLOR}RuntimeError: {self.message}\n  {pointer}\n    {code_line}\n    {' '*(self.token.column-1)}^"
+        return f"{_ERROR_COLOR}RuntimeError: {self.message}"
+
+    def __str__(self):
+        text = self._str_cache
+        if text is None:
+            text = self._str_cache = self._format()
+        return text
 
 
 # --------------------
@@ -1343,16 +3091,47 @@ async def run(code, filename):
 # --------------------
 # FILE RUNNER FUNCTION
 # --------------------
+_event_loop = None
+
+
+def _run_to_completion(coro):
+    """
+    Run coro on an event loop kept for the whole process. asyncio.run()
+    would build and tear down a loop on every call, which repeated
+    run_file() calls (a REPL, a test harness) pay for each time. As with
+    asyncio.run(), tasks still pending when coro finishes are cancelled,
+    then async generators are finalized and the loop's default executor is
+    shut down. The interpreter runs async() calls on its own executor, so
+    later runs on the same loop never need the default one.
+    """
+    global _event_loop
+    if _event_loop is None or _event_loop.is_closed():
+        _event_loop = asyncio.new_event_loop()
+        atexit.register(_event_loop.close)
+    loop = _event_loop
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        pending = asyncio.all_tasks(loop)
+        if pending:
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(loop.shutdown_default_executor())
+
+
 def run_file(file):
-    with open(file, "r") as f:
-        code = f.read()
-    asyncio.run(run(code, filename=file))
+    code = _read_source(file)
+    _run_to_completion(run(code, filename=file))
 
 
 # --------------------
 # COMMAND-LINE INTERFACE
 # --------------------
 if __name__ == "__main__":
+    import argparse  # Command-line argument parsing
+
     parser = argparse.ArgumentParser(description="VirtoLang")
     parser.add_argument("file", nargs="?", help="The file to run.")
     parser.add_argument("-C", help="Run code directly instead of a file.")
@@ -1365,31 +3144,33 @@ if __name__ == "__main__":
 
     try:
         if args.code is not None:
-            asyncio.run(run(args.code, filename="<inline>"))
+            _run_to_completion(run(args.code, filename="<inline>"))
         elif args.C is not None:
-            asyncio.run(run(args.C, filename="<inline>"))
+            _run_to_completion(run(args.C, filename="<inline>"))
         elif args.file:
             if not os.path.isfile(args.file):
-                print(f"{Fore.RED}Error: {args.file} is not a valid file.")
+                print(f"{_ERROR_COLOR}Error: {args.file} is not a valid file.")
                 sys.exit(1)
             if os.path.splitext(args.file)[1] != ".vlang":
-                print(f"{Fore.RED}Error: {args.file} is not a .vlang file.")
+                print(f"{_ERROR_COLOR}Error: {args.file} is not a .vlang file.")
                 sys.exit(1)
             # Try running the file
             run_file(args.file)
         else:
             parser.print_usage()
-            print(f"{Fore.RED}Error: Must provide a file or use -C/--code to run code.")
+            print(
+                f"{_ERROR_COLOR}Error: Must provide a file or use -C/--code to run code."
+            )
             sys.exit(1)
     except ParserError as e:
-        print(f"{Fore.RED}{e}")
+        print(f"{_ERROR_COLOR}{e}")
         sys.exit(1)
     except VirtoArgumentError as e:
-        print(f"{Fore.RED}{e}")
+        print(f"{_ERROR_COLOR}{e}")
         sys.exit(1)
     except VirtoRuntimeError as e:
-        print(f"{Fore.RED}{e}")
+        print(f"{_ERROR_COLOR}{e}")
         sys.exit(1)
     except Exception as e:
-        print(f"{Fore.RED}Interpreter bug: {e}")
+        print(f"{_ERROR_COLOR}Interpreter bug: {e}")
         # traceback.print_exc()